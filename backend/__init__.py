@@ -1,5 +1,6 @@
 from .query_agent import QueryValidationAgent, QueryAnalysis
 from .chat_service import VectorStoreService, ChatService
+from .pipeline import get_chat_service
 from .similarity_agent import SimilarityComparisonAgent
 from .funny_fallback_agent import FunnyFallbackAgent
 from .personal_info_guard import PersonalInfoGuard
@@ -10,6 +11,7 @@ __all__ = [
     'QueryAnalysis', 
     'VectorStoreService',
     'ChatService',
+    'get_chat_service',
     'SimilarityComparisonAgent',
     'FunnyFallbackAgent',
     'PersonalInfoGuard',
@@ -1,26 +1,52 @@
 import os
-from typing import Dict, Any
-from langchain_huggingface import HuggingFaceEmbeddings
+import pickle
+import hashlib
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Any, Callable, List, Optional
+import numpy as np
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from langchain_groq import ChatGroq
 from config import Settings
+from core.models.domain_vocabulary import get_vocabulary
+from core.models.query_features import QueryFeatures
+from .embedding_service import get_embedding_model
 from .query_agent import QueryValidationAgent
+from .intent_classifier import IntentClassifier
+from .query_router import QueryRouter
 from .similarity_agent import SimilarityComparisonAgent
+from .similarity_worker import SimilarityEvaluationWorker
 from .funny_fallback_agent import FunnyFallbackAgent
 from .personal_info_guard import PersonalInfoGuard
 
+@dataclass
+class ContextEntry:
+    session_id: str
+    message_id: str
+    text: str
+    timestamp: str
+
 class VectorStoreService:
     def __init__(self):
         self.settings = Settings()
         self.vectorstore = None
         self.embedding_model = None
         self.context_vectorstore = None
+        self.keyword_vectorizer = None
+        # Each context message is embedded once; windows and sessions are pooled from these
+        self._message_vectors: Dict[str, np.ndarray] = {}
+        # Recency is served from ring buffers; the FAISS index only answers relevance queries
+        self._recent_context: Dict[str, Deque[ContextEntry]] = {}
+        # Every context index id per session, so expired sessions can be removed from FAISS
+        self._session_context_ids: Dict[str, List[str]] = {}
+        self._context_lock = threading.Lock()
     
     def load_vectorstore(self):
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=self.settings.EMBEDDING_MODEL
-        )
+        self.embedding_model = get_embedding_model()
         
         if not os.path.exists(self.settings.DB_FAISS_PATH):
             raise FileNotFoundError(f"FAISS folder '{self.settings.DB_FAISS_PATH}' not found!")
@@ -30,8 +56,33 @@ class VectorStoreService:
             self.embedding_model, 
             allow_dangerous_deserialization=True
         )
+        self.keyword_vectorizer = self.load_keyword_vectorizer()
         return self.vectorstore
     
+    def load_keyword_vectorizer(self):
+        """Load the TF-IDF model fitted on the indexed corpus, refitting it if the index changed"""
+        documents = [doc.page_content for doc in self.vectorstore.docstore._dict.values()]
+        fingerprint = hashlib.sha1("\0".join(sorted(self.vectorstore.docstore._dict.keys())).encode("utf-8")).hexdigest()
+        vectorizer_path = os.path.join(self.settings.DB_FAISS_PATH, self.settings.KEYWORD_VECTORIZER_FILE)
+        
+        if os.path.exists(vectorizer_path):
+            try:
+                with open(vectorizer_path, 'rb') as f:
+                    stored = pickle.load(f)
+                if stored.get('fingerprint') == fingerprint:
+                    return stored['vectorizer']
+                print("[KEYWORD MODEL] FAISS index changed, refitting keyword vectorizer")
+            except Exception as e:
+                print(f"Error loading keyword vectorizer: {e}")
+        
+        vectorizer = SimilarityComparisonAgent.fit_keyword_vectorizer(documents)
+        try:
+            with open(vectorizer_path, 'wb') as f:
+                pickle.dump({'fingerprint': fingerprint, 'vectorizer': vectorizer}, f)
+        except Exception as e:
+            print(f"Error saving keyword vectorizer: {e}")
+        return vectorizer
+    
     def hybrid_search(self, query, top_k=None, threshold=None):
         if top_k is None:
             top_k = self.settings.TOP_K
@@ -63,83 +114,145 @@ class VectorStoreService:
         return unique_hits[:top_k]
     
     def initialize_context_vectorstore(self):
-        """Initialize a separate vector store for conversation context"""
+        """Reset the conversation context store; the FAISS index is built from the first message added"""
         if self.embedding_model is None:
-            self.embedding_model = HuggingFaceEmbeddings(
-                model_name=self.settings.EMBEDDING_MODEL
-            )
+            self.embedding_model = get_embedding_model()
         
-        # Create a new empty vector store for context
-        from langchain_core.documents import Document
-        self.context_vectorstore = FAISS.from_documents([], self.embedding_model)
+        # FAISS cannot be built from an empty list, so the index waits for its first vector
+        self.context_vectorstore = None
+        with self._context_lock:
+            self._message_vectors = {}
+            self._recent_context = {}
+            self._session_context_ids = {}
         return self.context_vectorstore
     
-    def add_context_to_vectorstore(self, session_id: str, conversation_context: str):
-        """Add conversation context to the vector store"""
-        if self.context_vectorstore is None:
-            self.initialize_context_vectorstore()
-        
-        from langchain_core.documents import Document
-        from datetime import datetime
-        
-        # Create document with context
-        doc = Document(
-            page_content=conversation_context,
-            metadata={
-                "session_id": session_id,
-                "timestamp": datetime.now().isoformat(),
-                "type": "conversation_context"
-            }
-        )
+    def add_message_to_context(self, session_id: str, message_id: str, role: str, content: str, timestamp: str):
+        """Embed one conversation message, once, and add it to the context store"""
+        if message_id in self._message_vectors:
+            return
+        if self.embedding_model is None:
+            self.embedding_model = get_embedding_model()
+        
+        text = f"{role.capitalize()}: {content}"
+        vector = self.embedding_model.embed_documents([text])[0]
+        metadata = {
+            "session_id": session_id,
+            "message_id": message_id,
+            "timestamp": timestamp,
+            "type": "conversation_message"
+        }
         
-        # Add to context vector store
-        self.context_vectorstore.add_documents([doc])
+        entry = ContextEntry(session_id, message_id, text, timestamp)
+        with self._context_lock:
+            if self.context_vectorstore is None:
+                self.context_vectorstore = FAISS.from_embeddings(
+                    [(text, vector)], self.embedding_model, metadatas=[metadata], ids=[message_id]
+                )
+            else:
+                self.context_vectorstore.add_embeddings([(text, vector)], metadatas=[metadata], ids=[message_id])
+            self._session_context_ids.setdefault(session_id, []).append(message_id)
+            
+            recent = self._recent_context.get(session_id)
+            if recent is None:
+                recent = self._recent_context[session_id] = deque(maxlen=self.settings.CONTEXT_RECENT_BUFFER_SIZE)
+            if len(recent) == recent.maxlen:
+                # Only buffered messages are ever pooled, so the evicted vector can go too
+                self._message_vectors.pop(recent[0].message_id, None)
+            recent.append(entry)
+            self._message_vectors[message_id] = np.asarray(vector, dtype=np.float32)
     
-    def search_context(self, query: str, session_id: str = None, top_k: int = 3):
-        """Search for relevant conversation context"""
-        if self.context_vectorstore is None:
+    def expire_context(self, session_ids, idle_since: Optional[str] = None) -> int:
+        """Remove sessions from the context index and buffers; returns how many sessions were removed
+        
+        Besides ``session_ids``, any session whose latest entry is older than
+        ``idle_since`` (ISO timestamp) goes too, which covers sessions another
+        process expired from the shared store.
+        """
+        with self._context_lock:
+            expired = set(session_ids)
+            if idle_since is not None:
+                expired.update(
+                    session_id for session_id, recent in self._recent_context.items()
+                    if recent and recent[-1].timestamp < idle_since
+                )
+            expired.intersection_update(self._session_context_ids.keys() | self._recent_context.keys())
+            if not expired:
+                return 0
+            
+            index_ids = []
+            for session_id in expired:
+                for entry in self._recent_context.pop(session_id, ()):
+                    self._message_vectors.pop(entry.message_id, None)
+                index_ids.extend(self._session_context_ids.pop(session_id, ()))
+            if index_ids and self.context_vectorstore is not None:
+                self.context_vectorstore.delete(index_ids)
+        print(f"[CONTEXT] Expired {len(expired)} sessions ({len(index_ids)} context entries)")
+        return len(expired)
+    
+    def get_recent_context(self, session_id: Optional[str], limit: int = 5) -> List[ContextEntry]:
+        """The latest context entries of one session, oldest first
+
+        The service is shared by every session in the process, so without a
+        session there is no context to give rather than everyone's.
+        """
+        if session_id is None or limit <= 0:
+            return []
+        with self._context_lock:
+            recent = self._recent_context.get(session_id)
+            if not recent:
+                return []
+            # Walk back from the newest end so the cost depends on limit, not on the buffer size
+            return [recent[-i] for i in range(min(limit, len(recent)), 0, -1)]
+    
+    def get_window_embedding(self, session_id: str, window: Optional[int] = None) -> Optional[np.ndarray]:
+        """Mean-pool the cached vectors of a session's last ``window`` buffered messages (all of them when None)"""
+        with self._context_lock:
+            recent = self._recent_context.get(session_id)
+            if not recent:
+                return None
+            window = len(recent) if window is None else min(window, len(recent))
+            vectors = np.stack([self._message_vectors[recent[-i].message_id] for i in range(window, 0, -1)])
+        
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        pooled = vectors.mean(axis=0)
+        return pooled / max(float(np.linalg.norm(pooled)), 1e-12)
+    
+    def search_context(self, query: Optional[str], session_id: Optional[str], top_k: int = 3):
+        """Search for relevant conversation context
+        
+        Without a query, the session's recent window (pooled from cached message
+        vectors) is the query, so related earlier context costs no embedding.
+        """
+        if self.context_vectorstore is None or session_id is None:
             return []
         
         try:
             # Search for relevant context
-            results = self.context_vectorstore.similarity_search_with_score(query, k=top_k)
-            
-            # Filter by session_id if provided
-            if session_id:
-                filtered_results = []
-                for doc, score in results:
-                    if doc.metadata.get("session_id") == session_id:
-                        filtered_results.append((doc, score))
-                return filtered_results
+            if query:
+                results = self.context_vectorstore.similarity_search_with_score(query, k=top_k)
+            else:
+                window = self.get_window_embedding(session_id, self.settings.CONTEXT_WINDOW_MESSAGES)
+                if window is None:
+                    return []
+                results = self.context_vectorstore.similarity_search_with_score_by_vector(window.tolist(), k=top_k)
             
-            return results
+            # Only the caller's session; the index holds every session's messages
+            return [(doc, score) for doc, score in results if doc.metadata.get("session_id") == session_id]
         except Exception as e:
             print(f"Error searching context: {e}")
             return []
     
-    def get_context_summary(self, session_id: str = None, max_contexts: int = 5):
-        """Get a summary of conversation contexts"""
-        if self.context_vectorstore is None:
-            return ""
-        
+    def get_context_summary(self, session_id: Optional[str], max_contexts: int = 5):
+        """Get a summary of the most recent conversation contexts, straight from the ring buffers"""
         try:
-            # Get recent contexts
-            if session_id:
-                # Search for contexts from this session
-                results = self.context_vectorstore.similarity_search("", k=max_contexts)
-                session_contexts = [doc for doc in results if doc.metadata.get("session_id") == session_id]
-            else:
-                # Get most recent contexts
-                results = self.context_vectorstore.similarity_search("", k=max_contexts)
-                session_contexts = results
-            
+            session_contexts = self.get_recent_context(session_id, max_contexts)
             if not session_contexts:
                 return ""
             
             # Combine contexts
             context_summary = "Recent conversation context:\n"
-            for i, doc in enumerate(session_contexts[-max_contexts:], 1):
-                context_summary += f"{i}. {doc.page_content[:200]}...\n"
+            for i, entry in enumerate(session_contexts, 1):
+                context_summary += f"{i}. {entry.text[:200]}...\n"
             
             return context_summary
         except Exception as e:
@@ -150,41 +263,48 @@ class ChatService:
     def __init__(self):
         self.settings = Settings()
         self.vector_service = VectorStoreService()
-        self.query_agent = QueryValidationAgent()
+        self.query_agent = QueryValidationAgent(
+            IntentClassifier() if Settings.INTENT_CLASSIFIER_ENABLED else None
+        )
         self.similarity_agent = SimilarityComparisonAgent()
+        self.similarity_worker = SimilarityEvaluationWorker(
+            self.similarity_agent,
+            num_workers=self.settings.SIMILARITY_WORKERS,
+            max_queue_size=self.settings.SIMILARITY_QUEUE_SIZE,
+            batch_size=self.settings.SIMILARITY_BATCH_SIZE
+        )
         self.funny_fallback_agent = FunnyFallbackAgent()
         self.personal_info_guard = PersonalInfoGuard()
+        self.query_router = QueryRouter() if self.settings.ROUTER_ENABLED else None
+        self._llm = None
     
     def initialize(self):
         self.settings.validate_config()
+        get_vocabulary()
         self.vector_service.load_vectorstore()
         self.vector_service.initialize_context_vectorstore()
+        self.similarity_agent.keyword_vectorizer = self.vector_service.keyword_vectorizer
     
-    def _is_irrelevant_question(self, query: str) -> bool:
+    def _get_llm(self) -> ChatGroq:
+        # One client per service, reused by every request instead of one per call
+        if self._llm is None:
+            self._llm = ChatGroq(
+                model_name=self.settings.LLM_MODEL,
+                temperature=self.settings.LLM_TEMPERATURE,
+                groq_api_key=self.settings.GROQ_API_KEY,
+            )
+        return self._llm
+    
+    def _is_irrelevant_question(self, query: str, features: Optional[QueryFeatures] = None) -> bool:
         """Determine if a query is irrelevant to Kazi Farms HR topics"""
-        query_lower = query.lower()
-        
-        # HR-related keywords that are relevant
-        hr_keywords = [
-            'salary', 'pay', 'wage', 'compensation', 'income', 'earnings', 'payment',
-            'allowance', 'benefit', 'bonus', 'incentive', 'house allowance', 'transport allowance',
-            'medical allowance', 'food allowance', 'leave', 'vacation', 'sick leave',
-            'annual leave', 'casual leave', 'maternity leave', 'paternity leave', 'holiday',
-            'hr', 'human resources', 'employee', 'staff', 'personnel', 'recruitment',
-            'hiring', 'policy', 'procedure', 'job', 'position', 'role', 'designation',
-            'management', 'supervisor', 'manager', 'director', 'trainee', 'kazi farms',
-            'kazi', 'farms', 'company', 'department', 'office', 'work', 'employment'
-        ]
-        
-        # Check if query contains any HR-related keywords
-        for keyword in hr_keywords:
-            if keyword in query_lower:
-                return False  # Relevant question
+        features = features or QueryFeatures(query)
         
         # If no HR keywords found, likely irrelevant
-        return True
+        return not features.is_relevant
     
-    def process_query(self, query, conversation_context=""):
+    def process_query(self, query, conversation_context="", session_id: Optional[str] = None,
+                      on_token: Optional[Callable[[str], None]] = None):
+        """Answer one query; with on_token, the LLM answer is streamed to it chunk by chunk"""
         if self.vector_service.vectorstore is None:
             self.initialize()
         
@@ -193,8 +313,11 @@ class ChatService:
         if conversation_context:
             print(f"[CONVERSATION CONTEXT] {conversation_context[:200]}...")
         
+        # Every stage below reads from the same per-request features
+        features = QueryFeatures(query)
+        
         # Check for personal information queries first
-        personal_info_result = self.personal_info_guard.handle_personal_info_query(query)
+        personal_info_result = self.personal_info_guard.handle_personal_info_query(query, features)
         if personal_info_result["is_personal_query"]:
             print(f"[QUERY TYPE] {personal_info_result['query_type']}")
             print(f"[RESPONSE] {personal_info_result['response']}")
@@ -207,8 +330,26 @@ class ChatService:
                 "blocked": True
             }
         
-        is_complete, followup_suggestion = self.query_agent.validate_query_completeness(query)
-        query_analysis = self.query_agent.analyze_query(query)
+        # Decide whether this query needs retrieval before anything is embedded
+        route = self.query_router.route(features) if self.query_router else None
+        route_info = route.to_dict() if route else None
+        if route and route.route != 'retrieve':
+            routed_response = self.funny_fallback_agent.generate_fallback_response(
+                query, 0.0, route.context_type, features
+            )
+            print(f"[ROUTED RESPONSE] {routed_response}")
+            return {
+                "result": routed_response,
+                "source_documents": [],
+                "confidence": 0,
+                "query_analysis": None,
+                "followup_suggestion": "",
+                "route": route_info
+            }
+        
+        retrieval_start = time.perf_counter()
+        query_analysis = self.query_agent.analyze_query(query, features)
+        is_complete, followup_suggestion = self.query_agent.validate_query_completeness(query, query_analysis)
         
         # Log query analysis to terminal
         print(f"[QUERY ANALYSIS] Type: {query_analysis.query_type}, Complete: {is_complete}")
@@ -216,6 +357,8 @@ class ChatService:
             print(f"[EXTRACTED INFO] {query_analysis.extracted_info}")
         
         hits = self.vector_service.hybrid_search(query)
+        if self.query_router:
+            self.query_router.record_retrieval_time(time.perf_counter() - retrieval_start)
         
         # Log search results to terminal
         print(f"[SEARCH RESULTS] Found {len(hits)} results")
@@ -228,16 +371,17 @@ class ChatService:
         if not hits:
             print("[FALLBACK] No search results found")
             # Check if this is an irrelevant question
-            if self._is_irrelevant_question(query):
+            if self._is_irrelevant_question(query, features):
                 print("[IRRELEVANT QUESTION] Detected irrelevant query")
                 fallback_response = self.funny_fallback_agent.generate_fallback_response(
-                    query, 0.0, 'irrelevant_question'
+                    query, 0.0, 'irrelevant_question', features
                 )
             else:
                 fallback_response = self.funny_fallback_agent.analyze_query_context(
                     query,
                     [],
-                    0.0
+                    0.0,
+                    features
                 )
             print(f"[FALLBACK RESPONSE] {fallback_response}")
             return {
@@ -245,7 +389,8 @@ class ChatService:
                 "source_documents": [],
                 "confidence": 0,
                 "query_analysis": query_analysis,
-                "followup_suggestion": followup_suggestion
+                "followup_suggestion": followup_suggestion,
+                "route": route_info
             }
         
         avg_confidence = sum([hit[1] for hit in hits]) / len(hits) if hits else 0
@@ -259,10 +404,10 @@ class ChatService:
             print(f"[USING HIGHEST] Proceeding with highest confidence result anyway")
             
             # Check if this is an irrelevant question even with low confidence
-            if self._is_irrelevant_question(query):
+            if self._is_irrelevant_question(query, features):
                 print("[IRRELEVANT QUESTION] Detected irrelevant query with low confidence")
                 fallback_response = self.funny_fallback_agent.generate_fallback_response(
-                    query, highest_confidence, 'irrelevant_question'
+                    query, highest_confidence, 'irrelevant_question', features
                 )
                 print(f"[IRRELEVANT RESPONSE] {fallback_response}")
                 return {
@@ -270,7 +415,8 @@ class ChatService:
                     "source_documents": [hit[0] for hit in hits],
                     "confidence": highest_confidence,
                     "query_analysis": query_analysis,
-                    "followup_suggestion": followup_suggestion
+                    "followup_suggestion": followup_suggestion,
+                    "route": route_info
                 }
         
         # Use the highest confidence results for context instead of QA chain retriever
@@ -283,7 +429,8 @@ class ChatService:
             vector_context = ""
             if self.vector_service:
                 try:
-                    vector_context = self.vector_service.get_context_summary(max_contexts=3)
+                    # Scoped to the caller's session; the service is shared by every session in the process
+                    vector_context = self.vector_service.get_context_summary(session_id=session_id, max_contexts=3)
                 except Exception as e:
                     print(f"Error getting vector context: {e}")
             
@@ -308,15 +455,16 @@ Answer:"""
                 input_variables=["context", "question"]
             )
             
-            llm = ChatGroq(
-                model_name=self.settings.LLM_MODEL,
-                temperature=self.settings.LLM_TEMPERATURE,
-                groq_api_key=self.settings.GROQ_API_KEY,
-            )
-            
             prompt = prompt_template.format(context=context, question=query)
-            response = llm.invoke(prompt)
-            result = response.content
+            if on_token is None:
+                result = self._get_llm().invoke(prompt).content
+            else:
+                chunks = []
+                for chunk in self._get_llm().stream(prompt):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        on_token(chunk.content)
+                result = "".join(chunks)
             source_docs = [top_hit[0]]  # Use the highest confidence document
         else:
             result = "I don't have specific information about this in our database. Please contact Kazifarm directly for detailed information."
@@ -334,11 +482,12 @@ Answer:"""
             "source_documents": source_docs,
             "confidence": highest_confidence,  # Use highest confidence instead of average
             "query_analysis": query_analysis,
-            "followup_suggestion": followup_suggestion
+            "followup_suggestion": followup_suggestion,
+            "route": route_info
         }
     
-    def get_answer_with_sources(self, query, conversation_context=""):
-        response = self.process_query(query, conversation_context)
+    def get_answer_with_sources(self, query, conversation_context="", session_id: Optional[str] = None):
+        response = self.process_query(query, conversation_context, session_id)
         result = response["result"]
         
         # Log metadata to terminal instead of showing to user
@@ -354,24 +503,17 @@ Answer:"""
         
         return result
     
-    def process_query_with_similarity(self, query: str) -> Dict[str, Any]:
-        response = self.process_query(query)
+    def process_query_with_similarity(self, query: str, conversation_context: str = "", session_id: Optional[str] = None,
+                                      on_similarity: Optional[Callable[[Dict[str, Any], str], None]] = None) -> Dict[str, Any]:
+        """Answer the query and score similarity in the background; on_similarity receives (metrics, report)"""
+        response = self.process_query(query, conversation_context, session_id)
         
         if response.get("blocked"):
             return response
         
+        response["similarity_metrics"] = None
+        response["similarity_report"] = None
         if response.get("result"):
-            similarity_metrics = self.similarity_agent.calculate_comprehensive_similarity(
-                query, 
-                response["result"]
-            )
-            similarity_report = self.similarity_agent.generate_similarity_report(
-                query, 
-                response["result"], 
-                similarity_metrics
-            )
-            
-            response["similarity_metrics"] = similarity_metrics
-            response["similarity_report"] = similarity_report
+            self.similarity_worker.submit(query, response["result"], on_similarity)
         
         return response
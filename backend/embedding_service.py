@@ -0,0 +1,181 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+from config import Settings
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that remembers recently embedded queries"""
+
+    def __init__(self, base: Embeddings, cache_size: int = 256):
+        self.base = base
+        self.cache_size = cache_size
+        self._query_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self.get_cached_query(text)
+        if cached is not None:
+            return cached
+
+        vector = self.base.embed_query(text)
+        with self._lock:
+            self._query_cache[text] = vector
+            if len(self._query_cache) > self.cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def get_cached_query(self, text: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+            return vector
+
+class EmbeddingMicroBatcher(Embeddings):
+    """Coalesces concurrent embedding calls into batched forward passes
+
+    Each text is queued with a future. A dispatcher thread waits up to
+    ``max_wait_ms`` after the oldest queued text, or until ``max_batch_size``
+    texts are queued, encodes them in one ``embed_documents`` call and hands
+    every caller its own row. Calls already at least a full batch bypass the
+    queue. Queries and documents share batches, which assumes the model
+    encodes both the same way (true for the sentence-transformers default).
+    """
+
+    def __init__(self, base: Embeddings, max_wait_ms: float = 5.0, max_batch_size: int = 32):
+        self.base = base
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []  # (text, future, enqueued_at)
+        self._condition = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._batches = 0
+        self._batched_texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size:
+            return self.base.embed_documents(texts)
+        return [future.result() for future in self._submit(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit([text])[0].result()
+
+    def _submit(self, texts: List[str]) -> List[Future]:
+        futures = [Future() for _ in texts]
+        now = time.monotonic()
+        with self._condition:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._dispatcher.start()
+            self._pending.extend((text, future, now) for text, future in zip(texts, futures))
+            self._condition.notify()
+        return futures
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            # Hold the batch open until it is full or its oldest text has waited max_wait
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                vectors = self.base.embed_documents([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            self._batches += 1
+            self._batched_texts += len(batch)
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'batches': self._batches,
+            'texts': self._batched_texts,
+            'average_batch_size': self._batched_texts / self._batches if self._batches else 0.0
+        }
+
+EMBEDDING_RUNTIMES = ('torch', 'onnx', 'onnx-int8')
+# Lowest per-text cosine to the torch runtime each alternative must reach (scripts/check_embedding_parity.py).
+# The fp32 ONNX graph is numerically the same model; int8 weights move vectors slightly further
+RUNTIME_PARITY_MIN_COSINE = {
+    'onnx': 0.99,
+    'onnx-int8': 0.95
+}
+
+def _runtime_model_kwargs(runtime: str) -> dict:
+    if runtime == 'torch':
+        return {}
+    if runtime == 'onnx':
+        # sentence-transformers exports the ONNX graph on first load if the model repo lacks one
+        return {'backend': 'onnx'}
+    if runtime == 'onnx-int8':
+        return {
+            'backend': 'onnx',
+            'model_kwargs': {'file_name': Settings.EMBEDDING_ONNX_QUANTIZED_FILE}
+        }
+    raise ValueError(f"Unknown EMBEDDING_RUNTIME '{runtime}'. Expected one of: {', '.join(EMBEDDING_RUNTIMES)}")
+
+def load_embeddings(runtime: Optional[str] = None) -> HuggingFaceEmbeddings:
+    """Load Settings.EMBEDDING_MODEL on the requested runtime (defaults to Settings.EMBEDDING_RUNTIME)"""
+    runtime = runtime or Settings.EMBEDDING_RUNTIME
+    return HuggingFaceEmbeddings(
+        model_name=Settings.EMBEDDING_MODEL,
+        model_kwargs=_runtime_model_kwargs(runtime)
+    )
+
+def compare_runtimes(texts: List[str], runtime: str, reference: str = 'torch') -> Dict[str, float]:
+    """Measure cosine agreement between two runtimes on the same texts"""
+    import numpy as np
+    
+    expected = np.array(load_embeddings(reference).embed_documents(texts))
+    actual = np.array(load_embeddings(runtime).embed_documents(texts))
+    
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    agreement = np.sum(expected * actual, axis=1)
+    
+    return {
+        'min_cosine': float(agreement.min()),
+        'mean_cosine': float(agreement.mean())
+    }
+
+_embedding_model = None
+_lock = threading.Lock()
+
+def get_embedding_model() -> CachedEmbeddings:
+    """Return the process-wide embedding model, loading it on first use"""
+    global _embedding_model
+    if _embedding_model is not None:
+        return _embedding_model
+
+    with _lock:
+        if _embedding_model is None:
+            base = load_embeddings()
+            print(f"[EMBEDDINGS] Loaded {Settings.EMBEDDING_MODEL} on the {Settings.EMBEDDING_RUNTIME} runtime")
+            if Settings.EMBEDDING_BATCHING_ENABLED:
+                # Below the query cache, so cache hits never wait for a batch
+                base = EmbeddingMicroBatcher(base, Settings.EMBEDDING_BATCH_MAX_WAIT_MS, Settings.EMBEDDING_BATCH_MAX_SIZE)
+            _embedding_model = CachedEmbeddings(base, Settings.EMBEDDING_CACHE_SIZE)
+        return _embedding_model
@@ -1,5 +1,6 @@
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from core.models.query_features import QueryFeatures
 
 class FunnyFallbackAgent:
     def __init__(self):
@@ -48,6 +49,24 @@ class FunnyFallbackAgent:
                 "I'm here to help with HR policies and information from our knowledge base. For direct HR contact, please contact our HR Department.",
                 "I can provide information about HR policies and procedures. For HR contact details, please contact our HR Department directly."
             ],
+            'small_talk_greeting': [
+                "Hello! I'm the Kazi Farms assistant. Ask me about salaries, allowances, leave or company policies!",
+                "Hi there! I'm here to help with Kazi Farms HR information. What would you like to know?",
+                "Hello! Cluck cluck! I can help with salary structures, allowances, leave policies and more. What can I do for you?",
+                "Hey! I'm your Kazi Farms assistant. Ask me anything about our HR policies and procedures!"
+            ],
+            'small_talk_thanks': [
+                "You're welcome! Let me know if you have any other questions about Kazi Farms.",
+                "Happy to help! Feel free to ask me anything else about our policies.",
+                "Anytime! Even our busiest hen has time for one more question.",
+                "Glad I could help! I'm here whenever you need Kazi Farms information."
+            ],
+            'small_talk_farewell': [
+                "Goodbye! Come back anytime you have questions about Kazi Farms.",
+                "Take care! I'll be here roosting until your next question.",
+                "See you later! I'm always here to help with Kazi Farms information.",
+                "Bye for now! Have a great day."
+            ],
             'irrelevant_question': [
                 "I'm a Kazi Farms chatbot, not a sports commentator! I can tell you about supervisor salaries, but not football captains!",
                 "That's not in my Kazi Farms database! I'm more of a 'salary structures and leave policies' kind of chatbot!",
@@ -85,14 +104,15 @@ class FunnyFallbackAgent:
         responses = self.funny_responses.get(response_type, self.funny_responses['no_context'])
         return random.choice(responses)
     
-    def generate_fallback_response(self, query: str, confidence: float = 0.0, context_type: str = 'no_context') -> str:
+    def generate_fallback_response(self, query: str, confidence: float = 0.0, context_type: str = 'no_context',
+                                   features: Optional[QueryFeatures] = None) -> str:
         funny_part = self.get_funny_response(context_type)
         
-        # For personal questions, HR contact questions, and irrelevant questions, don't add suggestions or contact info
-        if context_type in ['personal_identity', 'personal_greeting', 'hr_contact', 'irrelevant_question']:
+        # For personal questions, HR contact questions, irrelevant questions and small talk, don't add suggestions or contact info
+        if context_type in ['personal_identity', 'personal_greeting', 'hr_contact', 'irrelevant_question'] or context_type.startswith('small_talk'):
             return funny_part
         
-        suggestions = self._get_helpful_suggestions(query)
+        suggestions = self._get_helpful_suggestions(query, features)
         
         contact_section = self._format_contact_info()
         
@@ -112,31 +132,32 @@ class FunnyFallbackAgent:
         
         return response
     
-    def _get_helpful_suggestions(self, query: str) -> List[str]:
-        query_lower = query.lower()
+    def _get_helpful_suggestions(self, query: str, features: Optional[QueryFeatures] = None) -> List[str]:
+        features = features or QueryFeatures(query)
+        topic = features.vocabulary.suggestion_topic(features.vocabulary_hits)
         
-        if any(word in query_lower for word in ['salary', 'pay', 'wage', 'money']):
+        if topic == 'salary':
             return [
                 "Salary structures for Management Trainees",
                 "Salary scales for different job groups",
                 "Yearly increment policies",
                 "Performance-based salary reviews"
             ]
-        elif any(word in query_lower for word in ['allowance', 'benefit', 'perk']):
+        elif topic == 'allowance':
             return [
                 "House allowance for different locations",
                 "Transport allowance policies",
                 "Medical allowance benefits",
                 "Production and performance bonuses"
             ]
-        elif any(word in query_lower for word in ['leave', 'vacation', 'holiday', 'off']):
+        elif topic == 'leave':
             return [
                 "Sick leave policies and procedures",
                 "Annual leave entitlements",
                 "Casual leave guidelines",
                 "Maternity and paternity leave"
             ]
-        elif any(word in query_lower for word in ['policy', 'rule', 'regulation']):
+        elif topic == 'policy':
             return [
                 "HR policies and procedures",
                 "Employee conduct policies",
@@ -152,46 +173,28 @@ class FunnyFallbackAgent:
             contact_text += f"{value}\n"
         return contact_text.strip()
     
-    def analyze_query_context(self, query: str, search_results: List[Any], confidence: float) -> str:
-        query_lower = query.lower()
+    def analyze_query_context(self, query: str, search_results: List[Any], confidence: float,
+                              features: Optional[QueryFeatures] = None) -> str:
+        features = features or QueryFeatures(query)
         
         # Check for personal identity questions first
-        personal_identity_keywords = [
-            'who am i', 'who are you', 'identify me', 'my identity', 'personal information',
-            'my name', 'my email', 'my details', 'about me', 'tell me about myself'
-        ]
-        
-        for keyword in personal_identity_keywords:
-            if keyword in query_lower:
-                return self.generate_fallback_response(query, confidence, 'personal_identity')
+        if features.is_personal_identity:
+            return self.generate_fallback_response(query, confidence, 'personal_identity', features)
         
         # Check for personal greetings
-        personal_greeting_keywords = [
-            'how are you', 'how do you do', 'how\'s it going', 'how are things', 
-            'what\'s up', 'how\'s your day', 'are you okay', 'are you fine',
-            'how are you doing', 'how\'s everything', 'how\'s life'
-        ]
-        
-        for keyword in personal_greeting_keywords:
-            if keyword in query_lower:
-                return self.generate_fallback_response(query, confidence, 'personal_greeting')
+        if features.is_personal_greeting:
+            return self.generate_fallback_response(query, confidence, 'personal_greeting', features)
         
         # Check for HR contact requests
-        hr_contact_keywords = [
-            'hr email', 'hr contact', 'hr department', 'hr phone', 'hr number', 'contact hr', 
-            'hr address', 'hr office', 'hr manager', 'hr director', 'give me email of hr'
-        ]
-        
-        for keyword in hr_contact_keywords:
-            if keyword in query_lower:
-                return self.generate_fallback_response(query, confidence, 'hr_contact')
+        if features.is_hr_contact:
+            return self.generate_fallback_response(query, confidence, 'hr_contact', features)
         
         if not search_results or confidence < 0.1:
-            return self.generate_fallback_response(query, confidence, 'no_context')
+            return self.generate_fallback_response(query, confidence, 'no_context', features)
         elif confidence < 0.3:
-            return self.generate_fallback_response(query, confidence, 'low_confidence')
+            return self.generate_fallback_response(query, confidence, 'low_confidence', features)
         else:
-            return self.generate_fallback_response(query, confidence, 'general_help')
+            return self.generate_fallback_response(query, confidence, 'general_help', features)
     
     def get_encouragement_message(self) -> str:
         encouragements = [
@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+from config import Settings
+from core.models.domain_vocabulary import DomainVocabulary, get_vocabulary
+from .embedding_service import get_embedding_model
+
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float  # Cosine similarity to the winning centroid
+    margin: float  # Lead over the runner-up centroid
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over the shared query embedding
+
+    Each intent's labelled examples are encoded once into a unit-length
+    centroid row. Classifying a query is then one matrix-vector product
+    against the query vector retrieval already computes (served from the
+    embedding cache), and the best score doubles as the confidence.
+    """
+
+    def __init__(self, embedding_model=None, threshold: Optional[float] = None):
+        self.embedding_model = embedding_model
+        self.threshold = Settings.INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        self.intents: Tuple[str, ...] = ()
+        self.centroids: Optional[np.ndarray] = None
+        self._vocabulary: Optional[DomainVocabulary] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def centroids_path() -> str:
+        return os.path.join(Settings.DB_FAISS_PATH, Settings.INTENT_CENTROIDS_FILE)
+
+    @staticmethod
+    def examples_fingerprint(examples: Dict[str, Tuple[str, ...]]) -> str:
+        """Identify the examples and model a centroid matrix was built from"""
+        payload = json.dumps([Settings.EMBEDDING_MODEL, sorted(examples.items())])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _get_embedding_model(self):
+        if self.embedding_model is None:
+            self.embedding_model = get_embedding_model()
+        return self.embedding_model
+
+    def build_centroids(self, examples: Dict[str, Tuple[str, ...]]) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """Encode every example in one batch and average them into one unit row per intent"""
+        intents = tuple(intent for intent, texts in examples.items() if texts)
+        if not intents:
+            return (), np.zeros((0, 0), dtype=np.float32)
+
+        texts = [text for intent in intents for text in examples[intent]]
+        vectors = np.asarray(self._get_embedding_model().embed_documents(texts), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        centroids = np.empty((len(intents), vectors.shape[1]), dtype=np.float32)
+        start = 0
+        for row, intent in enumerate(intents):
+            end = start + len(examples[intent])
+            centroids[row] = vectors[start:end].mean(axis=0)
+            start = end
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return intents, centroids
+
+    def load(self, vocabulary: Optional[DomainVocabulary] = None):
+        """Load the cached centroid matrix, rebuilding it when the examples or model changed"""
+        vocabulary = vocabulary or get_vocabulary()
+        fingerprint = self.examples_fingerprint(vocabulary.intent_examples)
+        path = self.centroids_path()
+
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as cached:
+                    if str(cached['fingerprint']) == fingerprint:
+                        self.intents = tuple(str(intent) for intent in cached['intents'])
+                        self.centroids = cached['centroids']
+                        self._vocabulary = vocabulary
+                        print(f"[INTENT] Loaded {len(self.intents)} intent centroids")
+                        return
+            except Exception as e:
+                print(f"[INTENT] Could not read {path}, rebuilding: {e}")
+
+        self.intents, self.centroids = self.build_centroids(vocabulary.intent_examples)
+        self._vocabulary = vocabulary
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez(path, fingerprint=np.array(fingerprint), intents=np.array(self.intents), centroids=self.centroids)
+        except Exception as e:
+            print(f"[INTENT] Could not cache intent centroids: {e}")
+        print(f"[INTENT] Built {len(self.intents)} intent centroids")
+
+    def classify(self, query: str) -> Optional[IntentPrediction]:
+        """Return the nearest intent, or None when no centroids are available"""
+        vocabulary = get_vocabulary()
+        if vocabulary is not self._vocabulary:
+            with self._lock:
+                if vocabulary is not self._vocabulary:
+                    self.load(vocabulary)
+
+        intents, centroids = self.intents, self.centroids
+        if centroids is None or not intents:
+            return None
+
+        vector = np.asarray(self._get_embedding_model().embed_query(query), dtype=np.float32)
+        scores = centroids @ vector / max(float(np.linalg.norm(vector)), 1e-12)
+        best = int(np.argmax(scores))
+        runner_up = float(np.partition(scores, -2)[-2]) if len(scores) > 1 else 0.0
+        return IntentPrediction(intents[best], float(scores[best]), float(scores[best]) - runner_up)
+
+    def predict(self, query: str) -> Optional[IntentPrediction]:
+        """Like classify, but None unless the prediction clears the confidence threshold"""
+        prediction = self.classify(query)
+        if prediction is None or prediction.confidence < self.threshold:
+            return None
+        return prediction
+
+if __name__ == "__main__":
+    # Precompute the centroid matrix offline, e.g. right after rebuilding the FAISS index
+    IntentClassifier().load()
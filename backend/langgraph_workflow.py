@@ -4,6 +4,7 @@ import random
 from typing import Dict, List, Any, Optional, TypedDict
 from dataclasses import dataclass
 import asyncio
+import time
 
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
@@ -17,15 +18,23 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 
 from .query_agent import QueryValidationAgent, QueryAnalysis
+from .intent_classifier import IntentClassifier
+from .query_router import QueryRouter
 from .chat_service import VectorStoreService, ChatService
 from .similarity_agent import SimilarityComparisonAgent
+from .similarity_worker import SimilarityEvaluationWorker
+from config import Settings
 from .funny_fallback_agent import FunnyFallbackAgent
 from .personal_info_guard import PersonalInfoGuard
 from core.models.simple_query_matcher import SimpleQueryMatcher, MatchResult
+from core.models.query_features import QueryFeatures
 
 class ChatbotState(TypedDict):
     user_query: str
     messages: List[Any]
+    query_features: Optional[QueryFeatures]
+    route_decision: Optional[Dict[str, Any]]
+    retrieval_seconds: float
     query_analysis: Optional[QueryAnalysis]
     is_complete_query: bool
     followup_suggestion: str
@@ -40,10 +49,14 @@ class ChatbotState(TypedDict):
     confidence_score: float
     error_message: Optional[str]
     should_continue: bool
+    blocked: bool
 
 class ChatbotStateWithSimilarity(TypedDict):
     user_query: str
     messages: List[Any]
+    query_features: Optional[QueryFeatures]
+    route_decision: Optional[Dict[str, Any]]
+    retrieval_seconds: float
     query_analysis: Optional[QueryAnalysis]
     is_complete_query: bool
     followup_suggestion: str
@@ -60,15 +73,25 @@ class ChatbotStateWithSimilarity(TypedDict):
     similarity_report: Optional[str]
     error_message: Optional[str]
     should_continue: bool
+    blocked: bool
 
 class LangGraphWorkflow:
     def __init__(self):
-        self.query_agent = QueryValidationAgent()
+        self.query_agent = QueryValidationAgent(
+            IntentClassifier() if Settings.INTENT_CLASSIFIER_ENABLED else None
+        )
         self.query_matcher = SimpleQueryMatcher()
         self.vector_service = VectorStoreService()
         self.similarity_agent = SimilarityComparisonAgent()
+        self.similarity_worker = SimilarityEvaluationWorker(
+            self.similarity_agent,
+            num_workers=Settings.SIMILARITY_WORKERS,
+            max_queue_size=Settings.SIMILARITY_QUEUE_SIZE,
+            batch_size=Settings.SIMILARITY_BATCH_SIZE
+        )
         self.funny_fallback_agent = FunnyFallbackAgent()
         self.personal_info_guard = PersonalInfoGuard()
+        self.query_router = QueryRouter() if Settings.ROUTER_ENABLED else None
         
         self.llm = ChatGroq(
             model_name="llama-3.1-70b-versatile",
@@ -101,7 +124,7 @@ class LangGraphWorkflow:
         
         workflow.set_entry_point("analyze_query")
         
-        workflow.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling"})
+        workflow.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling", END: END})
         workflow.add_conditional_edges("vector_search", self.route_after_search, {"query_matching": "query_matching", "error_handling": "error_handling"})
         workflow.add_conditional_edges("query_matching", self.route_after_matching, {"response_generation": "response_generation", "error_handling": "error_handling"})
         workflow.add_conditional_edges("response_generation", self.route_after_generation, {"response_validation": "response_validation", "error_handling": "error_handling"})
@@ -132,7 +155,7 @@ class LangGraphWorkflow:
         
         workflow_with_similarity.set_entry_point("analyze_query")
         
-        workflow_with_similarity.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling"})
+        workflow_with_similarity.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling", END: END})
         workflow_with_similarity.add_conditional_edges("vector_search", self.route_after_search, {"query_matching": "query_matching", "error_handling": "error_handling"})
         workflow_with_similarity.add_conditional_edges("query_matching", self.route_after_matching, {"response_generation": "response_generation", "error_handling": "error_handling"})
         workflow_with_similarity.add_conditional_edges("response_generation", self.route_after_generation, {"response_validation": "response_validation", "error_handling": "error_handling"})
@@ -164,7 +187,7 @@ class LangGraphWorkflow:
         
         workflow_final.set_entry_point("analyze_query")
         
-        workflow_final.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling"})
+        workflow_final.add_conditional_edges("analyze_query", self.route_after_analysis, {"vector_search": "vector_search", "error_handling": "error_handling", END: END})
         workflow_final.add_conditional_edges("vector_search", self.route_after_search, {"query_matching": "query_matching", "error_handling": "error_handling"})
         workflow_final.add_conditional_edges("query_matching", self.route_after_matching, {"response_generation": "response_generation", "error_handling": "error_handling"})
         workflow_final.add_conditional_edges("response_generation", self.route_after_generation, {"response_validation": "response_validation", "error_handling": "error_handling"})
@@ -186,8 +209,12 @@ class LangGraphWorkflow:
             # Log user input to terminal
             print(f"\n[USER INPUT] {state['user_query']}")
             
+            # Every later node reads from the same per-request features
+            features = QueryFeatures(state['user_query'])
+            state['query_features'] = features
+            
             # Check for personal information queries first
-            personal_info_result = self.personal_info_guard.handle_personal_info_query(state['user_query'])
+            personal_info_result = self.personal_info_guard.handle_personal_info_query(state['user_query'], features)
             if personal_info_result["is_personal_query"]:
                 print(f"[QUERY TYPE] {personal_info_result['query_type']}")
                 print(f"[RESPONSE] {personal_info_result['response']}")
@@ -197,14 +224,28 @@ class LangGraphWorkflow:
                 state['blocked'] = True
                 return state
             
-            query_analysis = self.query_agent.analyze_query(state['user_query'])
-            is_complete, followup_suggestion = self.query_agent.validate_query_completeness(state['user_query'])
+            # Decide whether this query needs retrieval before anything is embedded
+            if self.query_router:
+                route = self.query_router.route(features)
+                state['route_decision'] = route.to_dict()
+                if route.route != 'retrieve':
+                    state['final_response'] = self.funny_fallback_agent.generate_fallback_response(
+                        state['user_query'], 0.0, route.context_type, features
+                    )
+                    print(f"[ROUTED RESPONSE] {state['final_response']}")
+                    state['confidence_score'] = 0.0
+                    return state
+            
+            analysis_start = time.perf_counter()
+            query_analysis = self.query_agent.analyze_query(state['user_query'], features)
+            is_complete, followup_suggestion = self.query_agent.validate_query_completeness(state['user_query'], query_analysis)
             
             # Log query analysis to terminal
             print(f"[QUERY ANALYSIS] Type: {query_analysis.query_type}, Complete: {is_complete}")
             if query_analysis.extracted_info:
                 print(f"[EXTRACTED INFO] {query_analysis.extracted_info}")
             
+            state['retrieval_seconds'] = time.perf_counter() - analysis_start
             state['query_analysis'] = query_analysis
             state['is_complete_query'] = is_complete
             state['followup_suggestion'] = followup_suggestion
@@ -217,8 +258,14 @@ class LangGraphWorkflow:
         try:
             if self.vector_service.vectorstore is None:
                 self.vector_service.load_vectorstore()
+                self.similarity_agent.keyword_vectorizer = self.vector_service.keyword_vectorizer
             
+            search_start = time.perf_counter()
             search_results = self.vector_service.hybrid_search(state['user_query'])
+            if self.query_router:
+                self.query_router.record_retrieval_time(
+                    state.get('retrieval_seconds', 0.0) + time.perf_counter() - search_start
+                )
             avg_confidence = sum([hit[1] for hit in search_results]) / len(search_results) if search_results else 0.0
             
             # Log search results to terminal
@@ -243,7 +290,8 @@ class LangGraphWorkflow:
             match_result = self.query_matcher.match_query_to_content(
                 state['user_query'], 
                 content_list, 
-                metadata_list
+                metadata_list,
+                state.get('query_features')
             )
             state['match_result'] = match_result
         except Exception as e:
@@ -262,7 +310,7 @@ class LangGraphWorkflow:
                 print(f"[USING HIGHEST] Proceeding with highest confidence result anyway")
             
             context = "\n\n".join([hit[0].page_content for hit in state['search_results']]) if state['search_results'] else ""
-            enhanced_prompt = self.query_matcher.generate_enhanced_prompt(state['user_query'], context, "")
+            enhanced_prompt = self.query_matcher.generate_enhanced_prompt(state['user_query'], context, "", state.get('query_features'))
             response = self.llm.invoke(enhanced_prompt)
             
             # Log LLM response to terminal
@@ -290,14 +338,15 @@ class LangGraphWorkflow:
                 fallback_response = self.funny_fallback_agent.analyze_query_context(
                     state['user_query'],
                     [],
-                    0.0
+                    0.0,
+                    state.get('query_features')
                 )
                 state['llm_response'] = fallback_response
                 state['source_documents'] = []
                 return state
             
             context = "\n\n".join([hit[0].page_content for hit in state['search_results']]) if state['search_results'] else ""
-            enhanced_prompt = self.query_matcher.generate_enhanced_prompt(state['user_query'], context, "")
+            enhanced_prompt = self.query_matcher.generate_enhanced_prompt(state['user_query'], context, "", state.get('query_features'))
             response = self.llm.invoke(enhanced_prompt)
             
             llm_response_lower = response.content.lower()
@@ -314,7 +363,8 @@ class LangGraphWorkflow:
                 fallback_response = self.funny_fallback_agent.analyze_query_context(
                     state['user_query'],
                     state['search_results'],
-                    state['search_confidence']
+                    state['search_confidence'],
+                    state.get('query_features')
                 )
                 state['llm_response'] = fallback_response
             else:
@@ -327,7 +377,8 @@ class LangGraphWorkflow:
             fallback_response = self.funny_fallback_agent.analyze_query_context(
                 state['user_query'],
                 state.get('search_results', []),
-                state.get('search_confidence', 0.0)
+                state.get('search_confidence', 0.0),
+                state.get('query_features')
             )
             state['llm_response'] = fallback_response
             state['source_documents'] = []
@@ -340,7 +391,8 @@ class LangGraphWorkflow:
                 is_valid = self.query_matcher.validate_answer_relevance(
                     state['user_query'],
                     state['llm_response'],
-                    context
+                    context,
+                    state.get('query_features')
                 )
                 state['is_valid_response'] = is_valid
                 state['validation_reason'] = "Response validated against query and context" if is_valid else "Response not relevant to query"
@@ -410,14 +462,11 @@ class LangGraphWorkflow:
     
     def similarity_comparison_node(self, state: ChatbotStateWithSimilarity) -> ChatbotStateWithSimilarity:
         try:
-            query = state['user_query']
-            response = state['final_response']
+            # Scoring only feeds diagnostics, so it runs on the background worker
+            self.similarity_worker.submit(state['user_query'], state['final_response'])
             
-            similarity_metrics = self.similarity_agent.calculate_comprehensive_similarity(query, response)
-            similarity_report = self.similarity_agent.generate_similarity_report(query, response, similarity_metrics)
-            
-            state['similarity_metrics'] = similarity_metrics
-            state['similarity_report'] = similarity_report
+            state['similarity_metrics'] = None
+            state['similarity_report'] = None
         except Exception as e:
             state['error_message'] = f"Similarity comparison failed: {str(e)}"
             state['should_continue'] = False
@@ -438,9 +487,12 @@ class LangGraphWorkflow:
         return state
     
     def route_after_analysis(self, state: ChatbotState) -> str:
+        if state.get('blocked', False):
+            return END
         if not state.get('should_continue', True):
             return "error_handling"
-        if state.get('blocked', False):
+        route = state.get('route_decision')
+        if route and route['route'] != 'retrieve':
             return END
         return "vector_search"
     
@@ -472,6 +524,9 @@ class LangGraphWorkflow:
         initial_state = {
             "user_query": query,
             "messages": [],
+            "query_features": None,
+            "route_decision": None,
+            "retrieval_seconds": 0.0,
             "query_analysis": None,
             "is_complete_query": True,
             "followup_suggestion": "",
@@ -485,7 +540,8 @@ class LangGraphWorkflow:
             "final_response": "",
             "confidence_score": 0.0,
             "error_message": None,
-            "should_continue": True
+            "should_continue": True,
+            "blocked": False
         }
         
         if workflow_type in ["similarity", "final"]:
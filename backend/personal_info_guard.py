@@ -1,7 +1,11 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from core.models.query_features import QueryFeatures
 
 class PersonalInfoGuard:
+    # Every pattern contains one of these, so a query without any of them skips the regex entirely
+    PREFILTER_ANCHORS = ("who ", "about m", "my ", "personal", "identify", "how are", "how do you", "how's", "what's up", "are you")
+    
     def __init__(self):
         self.personal_identity_patterns = [
             r'who am i',
@@ -67,24 +71,45 @@ class PersonalInfoGuard:
             "Job roles and responsibilities",
             "Performance evaluation processes"
         ]
+        
+        self._compile_patterns()
     
-    def is_personal_info_query(self, query: str) -> bool:
-        query_lower = query.lower().strip()
+    def _compile_patterns(self):
+        for pattern in self.personal_identity_patterns + self.personal_greeting_patterns:
+            literal = pattern.replace('\\', '')
+            if not any(anchor in literal for anchor in self.PREFILTER_ANCHORS):
+                raise ValueError(f"Personal info pattern '{pattern}' contains none of the prefilter anchors")
         
-        for pattern in self.personal_identity_patterns:
-            if re.search(pattern, query_lower):
-                return True
+        greeting = '|'.join(f'(?:{pattern})' for pattern in self.personal_greeting_patterns)
+        identity = '|'.join(f'(?:{pattern})' for pattern in self.personal_identity_patterns)
         
-        return False
+        # Greetings take precedence wherever they occur, so the greeting lookahead is tried first
+        self._combined_regex = re.compile(
+            f'^(?:(?=.*?(?P<personal_greeting>{greeting}))|(?=.*?(?P<personal_identity>{identity})))',
+            re.DOTALL
+        )
+        self._identity_regex = re.compile(identity)
     
-    def is_personal_greeting(self, query: str) -> bool:
-        query_lower = query.lower().strip()
+    def _may_be_personal(self, query_lower: str) -> bool:
+        return any(anchor in query_lower for anchor in self.PREFILTER_ANCHORS)
+    
+    def classify(self, query: str, features: Optional[QueryFeatures] = None) -> Optional[str]:
+        """Return 'personal_greeting', 'personal_identity' or None in a single pass"""
+        query_lower = features.stripped if features is not None else query.lower().strip()
         
-        for pattern in self.personal_greeting_patterns:
-            if re.search(pattern, query_lower):
-                return True
+        if not self._may_be_personal(query_lower):
+            return None
         
-        return False
+        match = self._combined_regex.match(query_lower)
+        return match.lastgroup if match else None
+    
+    def is_personal_info_query(self, query: str, features: Optional[QueryFeatures] = None) -> bool:
+        query_lower = features.stripped if features is not None else query.lower().strip()
+        
+        return self._may_be_personal(query_lower) and self._identity_regex.search(query_lower) is not None
+    
+    def is_personal_greeting(self, query: str, features: Optional[QueryFeatures] = None) -> bool:
+        return self.classify(query, features) == 'personal_greeting'
     
     def get_blocked_response(self) -> str:
         import random
@@ -104,9 +129,11 @@ class PersonalInfoGuard:
         
         return f"{base_response}\n\nHere's what I can help you with:\n{suggestions_text}\n\nPlease ask about any of these topics, and I'll be happy to assist you!"
     
-    def handle_personal_info_query(self, query: str) -> Dict[str, Any]:
+    def handle_personal_info_query(self, query: str, features: Optional[QueryFeatures] = None) -> Dict[str, Any]:
+        query_type = self.classify(query, features)
+        
         # Check for personal greetings first
-        if self.is_personal_greeting(query):
+        if query_type == 'personal_greeting':
             return {
                 "is_personal_query": True,
                 "response": self.get_greeting_response(),
@@ -116,7 +143,7 @@ class PersonalInfoGuard:
             }
         
         # Check for personal identity queries
-        if self.is_personal_info_query(query):
+        if query_type == 'personal_identity':
             return {
                 "is_personal_query": True,
                 "response": self.get_redirect_response(query),
@@ -0,0 +1,26 @@
+import threading
+from typing import Optional
+from .chat_service import ChatService
+
+_chat_service: Optional[ChatService] = None
+_lock = threading.Lock()
+
+def get_chat_service() -> ChatService:
+    """Return the process-wide, initialized ChatService, building it on first use
+
+    The FAISS index, embedding model, vocabulary and agents are loaded once
+    per process and shared by every session and Streamlit rerun. Everything
+    per user (conversation memory, context entries) is keyed by session id.
+    A failed initialization is not cached, so the next call retries.
+    """
+    global _chat_service
+    if _chat_service is not None:
+        return _chat_service
+
+    with _lock:
+        if _chat_service is None:
+            service = ChatService()
+            service.initialize()
+            print("[PIPELINE] Chat service initialized")
+            _chat_service = service
+        return _chat_service
@@ -1,6 +1,10 @@
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
+from core.models.domain_vocabulary import get_vocabulary
+from core.models.query_features import QueryFeatures
+from config import Settings
+from .intent_classifier import IntentClassifier, IntentPrediction
 
 @dataclass
 class QueryAnalysis:
@@ -11,42 +15,38 @@ class QueryAnalysis:
     confidence_score: float
     is_complete: bool
     suggested_followup: str
+    intent_confidence: float = 0.0  # Classifier confidence; 0.0 when keyword rules decided the type
 
 class QueryValidationAgent:
-    def __init__(self):
+    def __init__(self, intent_classifier: Optional[IntentClassifier] = None):
+        self.intent_classifier = intent_classifier
+        
         self.query_patterns = {
             'salary_inquiry': {
-                'keywords': ['salary', 'pay', 'wage', 'compensation', 'income', 'earnings', 'increment', 'revision'],
                 'required_info': ['designation', 'job_title', 'position', 'role', 'job_group'],
                 'optional_info': ['department', 'level', 'experience', 'location']
             },
             'allowance_inquiry': {
-                'keywords': ['allowance', 'benefit', 'perk', 'bonus', 'incentive', 'subsidy'],
                 'required_info': ['allowance_type'],
                 'optional_info': ['employee_category', 'location', 'department']
             },
             'policy_inquiry': {
-                'keywords': ['policy', 'rule', 'regulation', 'procedure', 'guideline', 'standard'],
                 'required_info': ['policy_area'],
                 'optional_info': ['employee_type', 'department', 'location']
             },
             'leave_inquiry': {
-                'keywords': ['leave', 'vacation', 'holiday', 'off', 'absence', 'break'],
                 'required_info': ['leave_type'],
                 'optional_info': ['employee_category', 'duration']
             },
             'hr_inquiry': {
-                'keywords': ['hr', 'human resource', 'recruitment', 'hiring', 'employee', 'staff'],
                 'required_info': ['hr_area'],
                 'optional_info': ['department', 'position']
             },
             'hr_contact': {
-                'keywords': ['hr email', 'hr contact', 'hr department', 'hr phone', 'hr number', 'contact hr', 'hr address', 'hr office', 'hr manager', 'hr director'],
                 'required_info': [],
                 'optional_info': []
             },
             'general_inquiry': {
-                'keywords': ['what', 'how', 'when', 'where', 'why', 'tell me', 'explain'],
                 'required_info': [],
                 'optional_info': []
             }
@@ -131,10 +131,19 @@ class QueryValidationAgent:
             ]
         }
     
-    def analyze_query(self, query: str) -> QueryAnalysis:
-        query_lower = query.lower()
-        query_type = self._classify_query_type(query_lower)
-        extracted_info = self._extract_information(query_lower, query_type)
+    def analyze_query(self, query: str, features: Optional[QueryFeatures] = None) -> QueryAnalysis:
+        features = features or QueryFeatures(query)
+        query_lower = features.normalized
+        hits = features.vocabulary_hits
+        query_type = self._classify_query_type(query_lower, hits)
+        intent_confidence = 0.0
+        
+        prediction = self._predict_intent(features.original, query_type)
+        if prediction:
+            query_type = prediction.intent
+            intent_confidence = prediction.confidence
+        
+        extracted_info = self._extract_information(query_lower, query_type, hits)
         missing_info = self._identify_missing_info(query_type, extracted_info)
         confidence_score = self._calculate_confidence(query_lower, query_type, extracted_info)
         is_complete = len(missing_info) == 0
@@ -147,130 +156,76 @@ class QueryValidationAgent:
             missing_info=missing_info,
             confidence_score=confidence_score,
             is_complete=is_complete,
-            suggested_followup=suggested_followup
+            suggested_followup=suggested_followup,
+            intent_confidence=intent_confidence
         )
     
-    def _classify_query_type(self, query: str) -> str:
-        query_lower = query.lower()
+    def _predict_intent(self, query: str, rule_type: str) -> Optional[IntentPrediction]:
+        """Nearest-centroid prediction, or None to keep the keyword rule result"""
+        # Personal questions stay with the rules so the guard behaviour never depends on the model
+        if self.intent_classifier is None or rule_type in ('personal_identity', 'personal_greeting'):
+            return None
         
-        # Check for personal identity questions first
-        personal_identity_keywords = [
-            'who am i', 'who are you', 'identify me', 'my identity', 'personal information',
-            'my name', 'my email', 'my details', 'about me', 'tell me about myself'
-        ]
-        
-        for keyword in personal_identity_keywords:
-            if keyword in query_lower:
-                return 'personal_identity'
+        try:
+            # The raw query is embedded exactly as retrieval will, so the vector is reused from the cache
+            prediction = self.intent_classifier.predict(query)
+        except Exception as e:
+            print(f"[INTENT] Classification failed, using keyword rules: {e}")
+            return None
         
-        # Check for personal greetings
-        personal_greeting_keywords = [
-            'how are you', 'how do you do', 'how\'s it going', 'how are things', 
-            'what\'s up', 'how\'s your day', 'are you okay', 'are you fine',
-            'how are you doing', 'how\'s everything', 'how\'s life'
-        ]
+        if prediction:
+            print(f"[INTENT] {prediction.intent} (confidence {prediction.confidence:.2f}, margin {prediction.margin:.2f})")
+            if prediction.intent != rule_type and prediction.margin < Settings.INTENT_MIN_MARGIN:
+                # A near-tie between centroids is no reason to overrule a deterministic keyword match
+                print(f"[INTENT] Margin below {Settings.INTENT_MIN_MARGIN}; keeping keyword rule {rule_type}")
+                return None
+        return prediction
+    
+    def _classify_query_type(self, query: str, hits: Optional[Set[str]] = None) -> str:
+        vocabulary = get_vocabulary()
+        if hits is None:
+            hits = vocabulary.find_terms(query.lower())
         
-        for keyword in personal_greeting_keywords:
-            if keyword in query_lower:
-                return 'personal_greeting'
+        # Check for personal identity questions first
+        if any(keyword in hits for keyword in vocabulary.personal_identity):
+            return 'personal_identity'
         
-        # Check other query types
-        for query_type, pattern_info in self.query_patterns.items():
-            for keyword in pattern_info['keywords']:
-                if keyword in query:
-                    return query_type
+        # Check for personal greetings
+        if any(keyword in hits for keyword in vocabulary.personal_greeting):
+            return 'personal_greeting'
         
-        return 'general_inquiry'
+        # Check other query types in vocabulary order
+        return vocabulary.first_query_type(hits) or 'general_inquiry'
     
-    def _extract_information(self, query: str, query_type: str) -> Dict[str, str]:
+    def _extract_information(self, query: str, query_type: str, hits: Optional[Set[str]] = None) -> Dict[str, str]:
+        vocabulary = get_vocabulary()
+        if hits is None:
+            hits = vocabulary.find_terms(query.lower())
         extracted = {}
         
         if query_type == 'salary_inquiry':
-            kazi_job_roles = [
-                'management trainee', 'sales person', 'farm manager', 'hatchery supervisor',
-                'feed mill manager', 'production manager', 'accountant', 'driver', 'helper',
-                'mechanic', 'farm in-charge', 'commercial manager', 'hr manager', 'admin officer',
-                'finance manager', 'quality manager', 'maintenance manager', 'security guard',
-                'cleaner', 'operator', 'technician', 'supervisor', 'officer', 'executive',
-                'manager', 'assistant manager', 'deputy manager', 'general manager'
-            ]
-            
-            for role in kazi_job_roles:
-                if role in query.lower():
-                    extracted['designation'] = role.title()
-                    break
-            
-            job_groups = ['job group 1', 'job group 2', 'job group 3', 'job group 4', 'job group 5']
-            for group in job_groups:
-                if group in query.lower():
-                    extracted['job_group'] = group
-                    break
+            role = vocabulary.first_extracted('designation', hits)
+            if role:
+                extracted['designation'] = role.title()
             
-            kazi_departments = [
-                'hatchery', 'farm', 'feed mill', 'sales', 'marketing', 'hr', 'finance',
-                'production', 'quality', 'maintenance', 'transport', 'commercial',
-                'panchagarh', 'thakurgaon', 'gojaria', 'sagarica', 'kfg', 'kml', 'kfil'
-            ]
+            group = vocabulary.first_extracted('job_group', hits)
+            if group:
+                extracted['job_group'] = group
             
-            for dept in kazi_departments:
-                if dept in query.lower():
-                    extracted['department'] = dept.title()
-                    break
+            dept = vocabulary.first_extracted('department', hits)
+            if dept:
+                extracted['department'] = dept.title()
             
             if 'management' in query.lower():
                 extracted['employee_category'] = 'Management'
             elif 'non-management' in query.lower() or 'worker' in query.lower():
                 extracted['employee_category'] = 'Non-Management'
         
-        elif query_type == 'allowance_inquiry':
-            kazi_allowances = [
-                'house allowance', 'location allowance', 'transport allowance', 'medical allowance',
-                'food allowance', 'hair cutting allowance', 'time keeping allowance', 'overtime allowance',
-                'night allowance', 'ta da allowance', 'fuel allowance', 'uniform allowance',
-                'guard allowance', 'furniture allowance', 'mobile allowance', 'pick drop allowance',
-                'production bonus', 'performance bonus', 'eid bonus', 'incentive', 'reliever allowance'
-            ]
-            
-            for allowance in kazi_allowances:
-                if allowance in query.lower():
-                    extracted['allowance_type'] = allowance.title()
-                    break
-        
-        elif query_type == 'policy_inquiry':
-            kazi_policies = [
-                'leave policy', 'retirement policy', 'recruitment policy', 'transfer policy',
-                'performance policy', 'overtime policy', 'bonus policy', 'allowance policy',
-                'travel policy', 'uniform policy', 'mobile policy', 'car policy',
-                'office time policy', 'deduction policy', 'notice pay policy'
-            ]
-            
-            for policy in kazi_policies:
-                if policy in query.lower():
-                    extracted['policy_area'] = policy.title()
-                    break
-        
-        elif query_type == 'leave_inquiry':
-            kazi_leave_types = [
-                'sick leave', 'annual leave', 'casual leave', 'maternity leave', 'paternity leave',
-                'emergency leave', 'replacement leave', 'off day', 'holiday', 'vacation'
-            ]
-            
-            for leave_type in kazi_leave_types:
-                if leave_type in query.lower():
-                    extracted['leave_type'] = leave_type.title()
-                    break
-        
-        elif query_type == 'hr_inquiry':
-            kazi_hr_areas = [
-                'recruitment', 'hiring', 'training', 'performance management', 'appraisal',
-                'promotion', 'transfer', 'resignation', 'termination', 'employee relations',
-                'compensation', 'benefits', 'payroll', 'attendance', 'discipline'
-            ]
-            
-            for hr_area in kazi_hr_areas:
-                if hr_area in query.lower():
-                    extracted['hr_area'] = hr_area.title()
-                    break
+        elif query_type in ['allowance_inquiry', 'policy_inquiry', 'leave_inquiry', 'hr_inquiry']:
+            field = self.query_patterns[query_type]['required_info'][0]
+            value = vocabulary.first_extracted(field, hits)
+            if value:
+                extracted[field] = value.title()
         
         return extracted
     
@@ -341,8 +296,8 @@ class QueryValidationAgent:
         else:
             return funny_reply
     
-    def validate_query_completeness(self, query: str) -> Tuple[bool, str]:
-        analysis = self.analyze_query(query)
+    def validate_query_completeness(self, query: str, analysis: Optional[QueryAnalysis] = None) -> Tuple[bool, str]:
+        analysis = analysis or self.analyze_query(query)
         
         if analysis.is_complete:
             return True, ""
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+from core.models.query_features import QueryFeatures
+
+# Stages a retrieve decision goes on to run, and so the stages a short circuit saves
+RETRIEVAL_STAGES = ('intent_classification', 'query_embedding', 'vector_search')
+
+@dataclass
+class RouteDecision:
+    route: str  # 'local', 'fallback' or 'retrieve'
+    reason: str
+    context_type: str = ''  # FunnyFallbackAgent response type for local and fallback routes
+    skipped_stages: Tuple[str, ...] = ()
+    routing_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'route': self.route,
+            'reason': self.reason,
+            'context_type': self.context_type,
+            'skipped_stages': list(self.skipped_stages),
+            'routing_ms': self.routing_ms
+        }
+
+class QueryRouter:
+    """Decides, from the vocabulary alone, whether a query needs retrieval at all
+
+    Small talk is answered locally and messages with an off-topic vocabulary
+    phrase but no HR topic term fall back straight away; everything else is
+    retrieved. Decisions are made before anything is embedded, so short
+    circuits save the whole retrieval path. The router errs towards retrieval:
+    it only short circuits on a positive signal, so a valid question the
+    vocabulary does not know (probation, dress code) is still searched, and
+    the low-confidence path after search decides whether it is irrelevant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = Counter()
+        self._reasons = Counter()
+        self._skipped = Counter()
+        self._retrievals_timed = 0
+        self._retrieval_seconds = 0.0
+
+    def route(self, features: QueryFeatures) -> RouteDecision:
+        start = time.perf_counter()
+
+        if features.small_talk:
+            decision = RouteDecision('local', f"small talk ({features.small_talk})",
+                                     f"small_talk_{features.small_talk}", RETRIEVAL_STAGES)
+        elif features.mentions_topic:
+            decision = RouteDecision('retrieve', "HR topic terms found")
+        elif features.mentions_off_topic:
+            decision = RouteDecision('fallback', "off-topic terms and no HR topic terms", 'irrelevant_question',
+                                     RETRIEVAL_STAGES)
+        else:
+            decision = RouteDecision('retrieve', "no routing signal")
+
+        decision.routing_ms = (time.perf_counter() - start) * 1000
+        self._record(decision)
+        return decision
+
+    def _record(self, decision: RouteDecision):
+        with self._lock:
+            self._routes[decision.route] += 1
+            self._reasons[decision.reason] += 1
+            self._skipped.update(decision.skipped_stages)
+
+        if decision.skipped_stages:
+            print(f"[ROUTER] {decision.route}: {decision.reason}; skipped {', '.join(decision.skipped_stages)} "
+                  f"(routed in {decision.routing_ms:.2f} ms)")
+        else:
+            print(f"[ROUTER] {decision.route}: {decision.reason}")
+
+    def record_retrieval_time(self, seconds: float):
+        """Record how long a retrieved query took, to estimate what short circuits save"""
+        with self._lock:
+            self._retrievals_timed += 1
+            self._retrieval_seconds += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            short_circuited = self._routes['local'] + self._routes['fallback']
+            average_retrieval = self._retrieval_seconds / self._retrievals_timed if self._retrievals_timed else 0.0
+            return {
+                'routes': dict(self._routes),
+                'reasons': dict(self._reasons),
+                'skipped_stages': dict(self._skipped),
+                'average_retrieval_seconds': average_retrieval,
+                'estimated_seconds_saved': short_circuited * average_retrieval
+            }
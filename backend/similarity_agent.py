@@ -1,21 +1,35 @@
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 import re
 from collections import Counter
 import difflib
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from core.models.domain_vocabulary import get_vocabulary
+from .embedding_service import get_embedding_model
+
+BATCH_SIMILARITY_DTYPE = [
+    ('semantic_similarity', 'f8'),
+    ('keyword_similarity', 'f8'),
+    ('structural_similarity', 'f8'),
+    ('content_relevance', 'f8'),
+    ('overall_similarity', 'f8'),
+    ('similarity_level', 'U9')
+]
 
 class SimilarityComparisonAgent:
     def __init__(self):
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = None
         
-        self.tfidf_vectorizer = TfidfVectorizer(
-            stop_words='english',
-            ngram_range=(1, 2),
-            max_features=1000
-        )
+        # Corpus-fitted vectorizer shared with VectorStoreService; per-pair fitting is the fallback
+        self.keyword_vectorizer = None
+        
+        self.similarity_weights = {
+            'semantic': 0.4,
+            'keyword': 0.3,
+            'structural': 0.2,
+            'content_relevance': 0.1
+        }
         
         self.similarity_thresholds = {
             'excellent': 0.8,
@@ -24,7 +38,23 @@ class SimilarityComparisonAgent:
             'poor': 0.2
         }
     
-    def preprocess_text(self, text: str) -> str:
+    @staticmethod
+    def create_keyword_vectorizer() -> TfidfVectorizer:
+        return TfidfVectorizer(
+            stop_words='english',
+            ngram_range=(1, 2),
+            max_features=1000
+        )
+    
+    @classmethod
+    def fit_keyword_vectorizer(cls, documents: List[str]) -> TfidfVectorizer:
+        """Fit the keyword vectorizer on the indexed document corpus"""
+        vectorizer = cls.create_keyword_vectorizer()
+        vectorizer.fit([cls.preprocess_text(document) for document in documents])
+        return vectorizer
+    
+    @staticmethod
+    def preprocess_text(text: str) -> str:
         if not text:
             return ""
         
@@ -36,13 +66,14 @@ class SimilarityComparisonAgent:
     
     def calculate_semantic_similarity(self, query: str, response: str) -> float:
         try:
-            query_clean = self.preprocess_text(query)
-            response_clean = self.preprocess_text(response)
+            if self.embedding_model is None:
+                self.embedding_model = get_embedding_model()
             
-            query_embedding = self.sentence_model.encode([query_clean])
-            response_embedding = self.sentence_model.encode([response_clean])
+            # The raw query is embedded exactly as retrieval did, so its vector comes from the cache
+            query_embedding = self.embedding_model.embed_query(query)
+            response_embedding = self.embedding_model.embed_documents([response])[0]
             
-            similarity = cosine_similarity(query_embedding, response_embedding)[0][0]
+            similarity = cosine_similarity([query_embedding], [response_embedding])[0][0]
             return float(similarity)
             
         except Exception as e:
@@ -53,8 +84,14 @@ class SimilarityComparisonAgent:
             query_clean = self.preprocess_text(query)
             response_clean = self.preprocess_text(response)
             
+            if self.keyword_vectorizer is not None:
+                # Rows are L2-normalised, so the sparse dot product is the cosine similarity
+                tfidf_matrix = self.keyword_vectorizer.transform([query_clean, response_clean])
+                return float(tfidf_matrix[0].multiply(tfidf_matrix[1]).sum())
+            
+            # A fresh vectorizer per pair keeps concurrent evaluations from sharing fitted state
             texts = [query_clean, response_clean]
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(texts)
+            tfidf_matrix = self.create_keyword_vectorizer().fit_transform(texts)
             
             similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
             return float(similarity)
@@ -87,27 +124,7 @@ class SimilarityComparisonAgent:
     
     def calculate_content_relevance(self, query: str, response: str) -> float:
         try:
-            kazi_keywords = [
-                'salary', 'allowance', 'policy', 'leave', 'hr', 'employee', 'management',
-                'worker', 'bonus', 'increment', 'transport', 'medical', 'house', 'location',
-                'overtime', 'production', 'performance', 'eid', 'sysnova', 'hatchery',
-                'farm', 'feed mill', 'sales', 'commercial', 'finance', 'quality',
-                'maintenance', 'driver', 'helper', 'mechanic', 'accountant', 'supervisor',
-                'manager', 'officer', 'executive', 'technician', 'operator', 'cleaner',
-                'guard', 'trainee', 'in-charge', 'person', 'level', 'group', 'structure',
-                'scale', 'grade', 'tier', 'bracket', 'range', 'wage', 'pay', 'compensation',
-                'remuneration', 'income', 'earnings', 'benefit', 'perk', 'incentive',
-                'subsidy', 'rule', 'regulation', 'guideline', 'procedure', 'standard',
-                'circular', 'order', 'notice', 'memo', 'vacation', 'holiday', 'off',
-                'absence', 'break', 'extra', 'additional', 'extended', 'beyond', 'travel',
-                'commute', 'vehicle', 'car', 'bus', 'health', 'treatment', 'hospital',
-                'clinic', 'doctor', 'financial', 'payment', 'cash', 'bill', 'claim',
-                'budget', 'ceiling', 'aid', 'retirement', 'pension', 'resignation',
-                'exit', 'departure', 'termination', 'identity', 'card', 'passport',
-                'document', 'handover', 'picnic', 'sample', 'collection', 'tray',
-                'factory', 'slaughtering', 'plant', 'egg', 'eggs', 'commercial',
-                'franchise', 'department', 'hardware', 'software', 'kazi', 'media'
-            ]
+            kazi_keywords = get_vocabulary().content_keywords
             
             query_clean = self.preprocess_text(query)
             response_clean = self.preprocess_text(response)
@@ -115,14 +132,11 @@ class SimilarityComparisonAgent:
             query_words = query_clean.split()
             response_words = response_clean.split()
             
-            query_domain_count = sum(1 for word in query_words if word in kazi_keywords)
-            response_domain_count = sum(1 for word in response_words if word in kazi_keywords)
-            
             if not query_words or not response_words:
                 return 0.0
             
-            query_relevance = query_domain_count / len(query_words)
-            response_relevance = response_domain_count / len(response_words)
+            query_relevance = self._domain_density(query_words, kazi_keywords)
+            response_relevance = self._domain_density(response_words, kazi_keywords)
             
             relevance_score = (query_relevance + response_relevance) / 2
             return float(relevance_score)
@@ -130,6 +144,19 @@ class SimilarityComparisonAgent:
         except Exception as e:
             return 0.0
     
+    @staticmethod
+    def _domain_density(words: List[str], kazi_keywords) -> float:
+        return sum(1 for word in words if word in kazi_keywords) / len(words) if words else 0.0
+    
+    def _similarity_level(self, overall_similarity: float) -> str:
+        if overall_similarity >= self.similarity_thresholds['excellent']:
+            return 'excellent'
+        elif overall_similarity >= self.similarity_thresholds['good']:
+            return 'good'
+        elif overall_similarity >= self.similarity_thresholds['fair']:
+            return 'fair'
+        return 'poor'
+    
     def calculate_comprehensive_similarity(self, query: str, response: str) -> Dict[str, Any]:
         try:
             semantic_sim = self.calculate_semantic_similarity(query, response)
@@ -137,12 +164,7 @@ class SimilarityComparisonAgent:
             structural_sim = self.calculate_structural_similarity(query, response)
             content_rel = self.calculate_content_relevance(query, response)
             
-            weights = {
-                'semantic': 0.4,
-                'keyword': 0.3,
-                'structural': 0.2,
-                'content_relevance': 0.1
-            }
+            weights = self.similarity_weights
             
             overall_similarity = (
                 semantic_sim * weights['semantic'] +
@@ -151,14 +173,7 @@ class SimilarityComparisonAgent:
                 content_rel * weights['content_relevance']
             )
             
-            if overall_similarity >= self.similarity_thresholds['excellent']:
-                similarity_level = 'excellent'
-            elif overall_similarity >= self.similarity_thresholds['good']:
-                similarity_level = 'good'
-            elif overall_similarity >= self.similarity_thresholds['fair']:
-                similarity_level = 'fair'
-            else:
-                similarity_level = 'poor'
+            similarity_level = self._similarity_level(overall_similarity)
             
             return {
                 'semantic_similarity': semantic_sim,
@@ -167,7 +182,7 @@ class SimilarityComparisonAgent:
                 'content_relevance': content_rel,
                 'overall_similarity': overall_similarity,
                 'similarity_level': similarity_level,
-                'weights': weights
+                'weights': dict(weights)
             }
             
         except Exception as e:
@@ -181,6 +196,87 @@ class SimilarityComparisonAgent:
                 'weights': {}
             }
     
+    def calculate_batch_similarity(self, pairs: List[Tuple[str, str]]) -> np.recarray:
+        """Score many (query, response) pairs at once, returning one record per pair"""
+        count = len(pairs)
+        records = np.zeros(count, dtype=BATCH_SIMILARITY_DTYPE).view(np.recarray)
+        if count == 0:
+            return records
+        
+        queries = [query for query, _ in pairs]
+        responses = [response for _, response in pairs]
+        queries_clean = [self.preprocess_text(query) for query in queries]
+        responses_clean = [self.preprocess_text(response) for response in responses]
+        
+        # Semantic: queries retrieval already embedded come from the query cache; the
+        # remaining queries and every response share one batched forward pass
+        if self.embedding_model is None:
+            self.embedding_model = get_embedding_model()
+        query_vectors = [self.embedding_model.get_cached_query(query) for query in queries]
+        misses = [i for i, vector in enumerate(query_vectors) if vector is None]
+        computed = self.embedding_model.embed_documents([queries[i] for i in misses] + responses)
+        for i, vector in zip(misses, computed):
+            query_vectors[i] = vector
+        embeddings = np.asarray(query_vectors + computed[len(misses):], dtype=np.float64)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms == 0, 1.0, norms)
+        records.semantic_similarity = np.einsum('ij,ij->i', embeddings[:count], embeddings[count:])
+        
+        # Keyword: transform-only TF-IDF with a row-wise sparse dot product
+        if self.keyword_vectorizer is not None:
+            query_matrix = self.keyword_vectorizer.transform(queries_clean)
+            response_matrix = self.keyword_vectorizer.transform(responses_clean)
+            records.keyword_similarity = np.asarray(query_matrix.multiply(response_matrix).sum(axis=1)).ravel()
+        else:
+            records.keyword_similarity = [self.calculate_keyword_similarity(q, r) for q, r in pairs]
+        
+        # Structural and content relevance work on the already cleaned texts
+        kazi_keywords = get_vocabulary().content_keywords
+        structural = np.empty(count)
+        query_density = np.empty(count)
+        response_density = np.empty(count)
+        has_words = np.empty(count, dtype=bool)
+        for i, (query_clean, response_clean) in enumerate(zip(queries_clean, responses_clean)):
+            query_words = query_clean.split()
+            response_words = response_clean.split()
+            sequence_similarity = difflib.SequenceMatcher(None, query_clean, response_clean).ratio()
+            query_set = set(query_words)
+            response_set = set(response_words)
+            union = query_set | response_set
+            word_overlap = len(query_set & response_set) / len(union) if query_set and response_set else 0.0
+            structural[i] = (sequence_similarity + word_overlap) / 2
+            query_density[i] = self._domain_density(query_words, kazi_keywords)
+            response_density[i] = self._domain_density(response_words, kazi_keywords)
+            has_words[i] = bool(query_words) and bool(response_words)
+        records.structural_similarity = structural
+        records.content_relevance = np.where(has_words, (query_density + response_density) / 2, 0.0)
+        
+        weights = self.similarity_weights
+        records.overall_similarity = (
+            records.semantic_similarity * weights['semantic'] +
+            records.keyword_similarity * weights['keyword'] +
+            records.structural_similarity * weights['structural'] +
+            records.content_relevance * weights['content_relevance']
+        )
+        thresholds = self.similarity_thresholds
+        records.similarity_level = np.select(
+            [
+                records.overall_similarity >= thresholds['excellent'],
+                records.overall_similarity >= thresholds['good'],
+                records.overall_similarity >= thresholds['fair']
+            ],
+            ['excellent', 'good', 'fair'],
+            default='poor'
+        )
+        return records
+    
+    def metrics_from_record(self, record) -> Dict[str, Any]:
+        """Convert one batch record to the dict returned by calculate_comprehensive_similarity"""
+        metrics = {field: float(record[field]) for field, _ in BATCH_SIMILARITY_DTYPE[:-1]}
+        metrics['similarity_level'] = str(record['similarity_level'])
+        metrics['weights'] = dict(self.similarity_weights)
+        return metrics
+    
     def generate_similarity_report(self, query: str, response: str, similarity_metrics: Dict[str, Any]) -> str:
         try:
             report = f"""
@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+class SimilarityEvaluationWorker:
+    """Scores query/response similarity on a bounded background pool, off the user's critical path"""
+
+    def __init__(self, similarity_agent, num_workers: int = 1, max_queue_size: int = 100,
+                 sink: Optional[Callable[[str, str, Dict[str, Any], str], None]] = None,
+                 batch_size: int = 16):
+        self.similarity_agent = similarity_agent
+        self.num_workers = max(1, num_workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.batch_size = max(1, batch_size)
+        self.sink = sink or self.log_result
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    def submit(self, query: str, response: str, callback: Optional[Callable[[Dict[str, Any], str], None]] = None):
+        """Queue a job and return immediately; the oldest job is dropped when the queue is full"""
+        with self._condition:
+            if not self._threads:
+                self._start()
+            if len(self._queue) >= self.max_queue_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((query, response, callback))
+            self.submitted += 1
+            self._condition.notify()
+
+    def _start(self):
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"similarity-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                # Drain whatever has piled up so it is scored in one batched pass
+                jobs = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+            try:
+                records = self.similarity_agent.calculate_batch_similarity(
+                    [(query, response) for query, response, _ in jobs]
+                )
+                for (query, response, callback), record in zip(jobs, records):
+                    metrics = self.similarity_agent.metrics_from_record(record)
+                    report = self.similarity_agent.generate_similarity_report(query, response, metrics)
+                    self.sink(query, response, metrics, report)
+                    if callback:
+                        callback(metrics, report)
+            except Exception as e:
+                print(f"[SIMILARITY] Evaluation failed: {e}")
+            finally:
+                with self._condition:
+                    self.completed += len(jobs)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the queued jobs are drained"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'queued': len(self._queue)
+            }
+
+    @staticmethod
+    def log_result(query: str, response: str, metrics: Dict[str, Any], report: str):
+        print(f"[SIMILARITY] {metrics['similarity_level'].upper()} ({metrics['overall_similarity']:.3f}) for query: {query[:80]}")
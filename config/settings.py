@@ -15,9 +15,18 @@ class Settings:
     
     # Paths
     DB_FAISS_PATH = "core/data/faiss_index"
+    VOCABULARY_PATH = "config/domain_vocabulary.json"
+    KEYWORD_VECTORIZER_FILE = "keyword_vectorizer.pkl"  # Stored inside DB_FAISS_PATH
+    INTENT_CENTROIDS_FILE = "intent_centroids.npz"  # Stored inside DB_FAISS_PATH
     
     # Model Settings
     EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+    EMBEDDING_RUNTIME = os.environ.get("EMBEDDING_RUNTIME", "torch")  # torch, onnx or onnx-int8
+    EMBEDDING_ONNX_QUANTIZED_FILE = "onnx/model_quint8_avx2.onnx"  # Graph used by the onnx-int8 runtime
+    EMBEDDING_CACHE_SIZE = 256  # Recent query embeddings shared by retrieval and scoring
+    EMBEDDING_BATCHING_ENABLED = True  # Coalesce concurrent embedding calls into batched forward passes
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))  # Longest a text waits for its batch to fill
+    EMBEDDING_BATCH_MAX_SIZE = int(os.environ.get("EMBEDDING_BATCH_MAX_SIZE", "32"))  # Texts encoded in one forward pass at most
     LLM_MODEL = "openai/gpt-oss-120b"
     LLM_TEMPERATURE = 0.0
     
@@ -25,9 +34,46 @@ class Settings:
     TOP_K = 5
     CONFIDENCE_THRESHOLD = 25  # Accept answers >= 25% confidence
     
+    # Routing Settings
+    ROUTER_ENABLED = True  # Answer small talk and off-topic queries before any embedding or search
+    
+    # Intent Classification Settings
+    INTENT_CLASSIFIER_ENABLED = True  # Keyword rules are used when disabled or not confident
+    INTENT_CONFIDENCE_THRESHOLD = 0.45  # Minimum cosine similarity to the nearest intent centroid
+    INTENT_MIN_MARGIN = 0.05  # Lead over the runner-up centroid needed to overrule a disagreeing keyword rule
+    
+    # Similarity Evaluation Settings
+    SIMILARITY_WORKERS = 1  # Background threads scoring responses after they are returned
+    SIMILARITY_QUEUE_SIZE = 100  # Oldest pending evaluations are dropped beyond this size
+    SIMILARITY_BATCH_SIZE = 16  # Queued evaluations scored together in one batched pass
+    
+    # HTTP API Settings
+    API_HOST = os.environ.get("API_HOST", "0.0.0.0")
+    API_PORT = int(os.environ.get("API_PORT", "8000"))
+    API_WORKERS = int(os.environ.get("API_WORKERS", "1"))  # uvicorn worker processes, each with its own preloaded pipeline
+    API_MAX_CONCURRENCY = 8  # Pipeline calls running at once per worker; further requests wait their turn
+    API_MAX_MESSAGE_CHARS = 4000  # Longer chat messages are rejected
+    
+    # Vocabulary Settings
+    VOCABULARY_RELOAD_SECONDS = 5  # Poll interval for hot-reloading the vocabulary file (0 disables)
+    
     # Memory Management Settings
     AUTO_CLEANUP_ENABLED = True  # Enable automatic memory cleanup on tab close
     SESSION_TIMEOUT_MINUTES = 30  # Session timeout in minutes for auto-cleanup
+    MEMORY_DB_FILE = "conversations.db"  # SQLite journal stored inside the memory directory
+    MEMORY_CHECKPOINT_INTERVAL = 200  # Writes between WAL checkpoints (compaction into the main file)
+    MEMORY_FLUSH_BATCH_SIZE = 32  # Queued writes that trigger an immediate background flush
+    MEMORY_FLUSH_INTERVAL_SECONDS = 1.0  # Longest a queued write waits before it is flushed
+    MEMORY_FSYNC_POLICY = os.environ.get("MEMORY_FSYNC_POLICY", "normal")  # off, normal or full
+    MEMORY_BUSY_TIMEOUT_MS = 5000  # How long a write waits for another process holding the database lock
+    MEMORY_CONNECTION_POOL_SIZE = 4  # Idle SQLite connections kept open per process; threads borrow them per operation
+    MEMORY_SESSION_CACHE_SIZE = 32  # Materialized conversations kept in the per-process LRU
+    # Opt in: imported and legacy history keeps its original timestamps, so the first sweep expires all of it that is older than the TTL
+    MEMORY_SESSION_TTL_MINUTES = float(os.environ.get("MEMORY_SESSION_TTL_MINUTES", "0"))  # Sessions idle this long are expired by the retention service (0, the default, disables it)
+    MEMORY_RETENTION_INTERVAL_SECONDS = 300  # How often the retention service sweeps for idle sessions
+    MEMORY_VACUUM_FREE_RATIO = 0.25  # Share of free database pages that triggers a VACUUM after a sweep
+    CONTEXT_WINDOW_MESSAGES = 5  # Recent messages pooled into a session's context window embedding
+    CONTEXT_RECENT_BUFFER_SIZE = 20  # Recent context entries kept per session in its ring buffer
     
     # Prompt Template
     CUSTOM_PROMPT_TEMPLATE = """
@@ -57,4 +103,12 @@ class Settings:
         """Validate that required configuration is present"""
         if not cls.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found. Please add it to your .env file or environment variables.")
+        if cls.EMBEDDING_RUNTIME not in ('torch', 'onnx', 'onnx-int8'):
+            raise ValueError(f"EMBEDDING_RUNTIME must be 'torch', 'onnx' or 'onnx-int8', got '{cls.EMBEDDING_RUNTIME}'.")
+        if cls.MEMORY_FSYNC_POLICY not in ('off', 'normal', 'full'):
+            raise ValueError(f"MEMORY_FSYNC_POLICY must be 'off', 'normal' or 'full', got '{cls.MEMORY_FSYNC_POLICY}'.")
+        if 0 < cls.MEMORY_SESSION_TTL_MINUTES < cls.SESSION_TIMEOUT_MINUTES:
+            raise ValueError("MEMORY_SESSION_TTL_MINUTES must be at least SESSION_TIMEOUT_MINUTES so live sessions are never expired.")
+        if cls.CONTEXT_WINDOW_MESSAGES > cls.CONTEXT_RECENT_BUFFER_SIZE:
+            raise ValueError("CONTEXT_WINDOW_MESSAGES cannot exceed CONTEXT_RECENT_BUFFER_SIZE; only buffered messages can be pooled.")
         return True
@@ -0,0 +1,145 @@
+import io
+import os
+import gzip
+import json
+import zlib
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+from .conversation_store import ConversationStore
+
+# An export is written here and renamed into place once complete; its complete lines are the resume checkpoint
+PARTIAL_SUFFIX = ".partial"
+
+# Called with the records safely in the partial file so far and the last of their session ids
+ProgressListener = Callable[[int, str], object]
+
+def _open_archive(path: str, mode: str, compress: Optional[bool]):
+    """Text stream over ``path``; gzip when asked or, by default, when the name ends in .gz"""
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _salvage(path: str, out: TextIO, compress: bool) -> Tuple[int, Optional[str]]:
+    """Copy the complete records of an interrupted export to ``out``; returns their count and last session id
+
+    Reading stops at the first truncated line or corrupt gzip block, which is
+    where the interrupted run stopped writing.
+    """
+    kept, last_session_id = 0, None
+    try:
+        with _open_archive(path, 'r', compress) as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    last_session_id = json.loads(line)['session_id']
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    break
+                out.write(line)
+                kept += 1
+    except (EOFError, zlib.error, gzip.BadGzipFile, UnicodeDecodeError) as e:
+        print(f"[ARCHIVE] Discarded the incomplete end of {path}: {e}")
+    return kept, last_session_id
+
+def export_conversations(store: ConversationStore, path: str, session_ids: Optional[Iterable[str]] = None,
+                         since: Optional[str] = None, until: Optional[str] = None, resume: bool = False,
+                         compress: Optional[bool] = None, on_progress: Optional[ProgressListener] = None,
+                         checkpoint_every: int = 100) -> Dict[str, Any]:
+    """Stream conversations to newline-delimited JSON, one session per line
+
+    Memory stays constant in the history size: sessions are read and written
+    one at a time, in session id order. ``since``/``until`` filter on last
+    activity. The export goes to ``path`` + PARTIAL_SUFFIX and is renamed to
+    ``path`` only once complete, so ``path`` never holds a torn archive.
+
+    Every ``checkpoint_every`` records the partial file is flushed, which
+    leaves it readable up to that point even when compressed, and
+    ``on_progress`` is told how far it got. With ``resume``, the complete
+    records of an interrupted run's partial file are kept and the export
+    continues after the last of them.
+    """
+    if compress is None:
+        compress = path.endswith('.gz')
+    checkpoint_every = max(1, checkpoint_every)
+    partial = path + PARTIAL_SUFFIX
+    # The previous partial file is set aside while its records are copied; if that copy is
+    # interrupted too, the set-aside file is still the complete one and is used again
+    previous = partial + ".previous"
+    if resume and os.path.exists(partial) and not os.path.exists(previous):
+        os.replace(partial, previous)
+    elif not resume and os.path.exists(previous):
+        os.remove(previous)
+
+    resumed, written = 0, 0
+    last_session_id = None
+    with _open_archive(partial, 'w', compress) as f:
+        if resume and os.path.exists(previous):
+            resumed, last_session_id = _salvage(previous, f, compress)
+            f.flush()
+            os.remove(previous)
+            print(f"[ARCHIVE] Resuming after {resumed} conversations (last session: {last_session_id})")
+
+        for conversation in store.iter_conversations(session_ids, since, until, last_session_id):
+            record = {
+                'session_id': conversation.session_id,
+                'created_at': conversation.created_at,
+                'last_updated': conversation.last_updated,
+                'summary': conversation.summary,
+                'messages': [asdict(msg) for msg in conversation.messages]
+            }
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            written += 1
+            last_session_id = conversation.session_id
+            if written % checkpoint_every == 0:
+                f.flush()
+                if on_progress is not None:
+                    on_progress(resumed + written, last_session_id)
+    os.replace(partial, path)
+    if on_progress is not None and written % checkpoint_every:
+        on_progress(resumed + written, last_session_id)
+    return {'exported': written, 'resumed': resumed, 'last_session_id': last_session_id}
+
+def read_archive(path: str, compress: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records of an export one line at a time"""
+    with _open_archive(path, 'r', compress) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number} is not a valid conversation record: {e}") from e
+
+def import_conversations(store: ConversationStore, path: str, compress: Optional[bool] = None) -> int:
+    """Stream an export back into the store; sessions that already exist are skipped"""
+    return store.import_conversations(read_archive(path, compress))
+
+if __name__ == "__main__":
+    # Nightly archiving, e.g. python -m core.memory.archive export archive.ndjson.gz --until 2025-01-01
+    import argparse
+    from config import Settings
+    from .conversation_store import get_conversation_store
+
+    parser = argparse.ArgumentParser(description="Export or import chat memory as newline-delimited JSON")
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('path')
+    parser.add_argument('--memory-dir', default="chatbot_memory")
+    parser.add_argument('--since', help="Only sessions active at or after this ISO timestamp")
+    parser.add_argument('--until', help="Only sessions last active before this ISO timestamp")
+    parser.add_argument('--session', action='append', dest='session_ids', help="Only this session (repeatable)")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted export from its .partial file")
+    args = parser.parse_args()
+
+    memory_store = get_conversation_store(os.path.join(args.memory_dir, Settings.MEMORY_DB_FILE))
+    if args.command == 'export':
+        result = export_conversations(
+            memory_store, args.path, args.session_ids, args.since, args.until, args.resume,
+            on_progress=lambda count, session_id: print(f"[ARCHIVE] {count} conversations written (last session: {session_id})")
+        )
+        print(f"[ARCHIVE] Exported {result['exported']} conversations, {result['resumed']} kept from the interrupted run")
+    else:
+        print(f"[ARCHIVE] Imported {import_conversations(memory_store, args.path)} conversations")
@@ -0,0 +1,251 @@
+import os
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from config import Settings
+from .conversation_store import Conversation, Message, get_conversation_store
+from .session_registry import SessionRegistry, new_session_id
+from .retention import get_retention_service
+from . import archive
+
+class ConversationMemory:
+    """Conversation memory for one user session, independent of any UI framework
+    
+    Instances are cheap: the store, its flusher and the retention service are
+    shared per memory directory, so an API request handler, a background
+    worker or a load test can create one per user session. UI adapters such
+    as the Streamlit ``MemoryManager`` mirror its state into their own.
+    """
+    
+    def __init__(self, memory_dir: str = "chatbot_memory", vector_service=None, session_id: Optional[str] = None):
+        self.memory_dir = memory_dir
+        self.current_session_id = session_id
+        # Legacy full-rewrite file, imported into the journal once if present
+        self.conversations_file = os.path.join(memory_dir, "conversations.json")
+        self.vector_service = vector_service
+        
+        os.makedirs(memory_dir, exist_ok=True)
+        # Shared per file, so every session's writes go through one background flusher
+        self.store = get_conversation_store(
+            os.path.join(memory_dir, Settings.MEMORY_DB_FILE),
+            checkpoint_interval=Settings.MEMORY_CHECKPOINT_INTERVAL,
+            flush_batch_size=Settings.MEMORY_FLUSH_BATCH_SIZE,
+            flush_interval=Settings.MEMORY_FLUSH_INTERVAL_SECONDS,
+            fsync_policy=Settings.MEMORY_FSYNC_POLICY,
+            busy_timeout_ms=Settings.MEMORY_BUSY_TIMEOUT_MS,
+            pool_size=Settings.MEMORY_CONNECTION_POOL_SIZE,
+            session_cache_size=Settings.MEMORY_SESSION_CACHE_SIZE
+        )
+        self.sessions = SessionRegistry(self.store)
+        self._import_legacy_conversations()
+        # Idle sessions are expired in the background, from the store and the context index
+        self.retention = get_retention_service(
+            self.store,
+            ttl_minutes=Settings.MEMORY_SESSION_TTL_MINUTES,
+            interval=Settings.MEMORY_RETENTION_INTERVAL_SECONDS,
+            vacuum_free_ratio=Settings.MEMORY_VACUUM_FREE_RATIO
+        )
+        if vector_service is not None:
+            self.retention.add_listener(vector_service.expire_context)
+    
+    def _import_legacy_conversations(self):
+        try:
+            self.store.import_legacy_json(self.conversations_file)
+        except Exception as e:
+            print(f"Error importing conversations: {e}")
+    
+    def _get_conversation(self, session_id: str) -> Optional[Conversation]:
+        """Return a session from the store's LRU, materializing it on a miss"""
+        try:
+            return self.store.load_conversation(session_id)
+        except Exception as e:
+            print(f"Error loading conversation: {e}")
+            return None
+    
+    def _get_recent_messages(self, session_id: str, limit: int) -> Optional[List[Message]]:
+        try:
+            return self.store.recent_messages(session_id, limit)
+        except Exception as e:
+            print(f"Error loading conversation: {e}")
+            return None
+    
+    def start_new_conversation(self) -> str:
+        """Start a new conversation session"""
+        # Time-ordered random ids, so sessions started in the same second never merge
+        try:
+            session_id = self.sessions.create_session().session_id
+        except Exception as e:
+            print(f"Error saving conversation: {e}")
+            session_id = new_session_id()
+        self.current_session_id = session_id
+        return session_id
+    
+    def add_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> Message:
+        """Add a message to the current conversation"""
+        if not self.current_session_id:
+            self.start_new_conversation()
+        
+        message = Message(
+            role=role,
+            content=content,
+            timestamp=datetime.now().isoformat(),
+            metadata=metadata,
+            message_id=uuid.uuid4().hex
+        )
+        
+        # Queue for the background flusher; this never waits on disk, and updates the cached session
+        try:
+            self.store.append_message(self.current_session_id, message)
+        except Exception as e:
+            print(f"Error saving message: {e}")
+        
+        # Store context in vector store; only this message is embedded
+        if self.vector_service and content.strip():
+            try:
+                self.vector_service.add_message_to_context(
+                    session_id=self.current_session_id,
+                    message_id=message.message_id,
+                    role=role,
+                    content=content,
+                    timestamp=message.timestamp
+                )
+            except Exception as e:
+                print(f"Error storing context in vector store: {e}")
+        
+        return message
+    
+    def get_conversation_context(self, max_messages: int = 10) -> str:
+        """Get recent conversation context for the LLM from vector store"""
+        if not self.current_session_id:
+            return ""
+        
+        # Try to get context from vector store first
+        if self.vector_service:
+            try:
+                vector_context = self.vector_service.get_context_summary(
+                    session_id=self.current_session_id, 
+                    max_contexts=max_messages
+                )
+                if vector_context:
+                    return vector_context
+            except Exception as e:
+                print(f"Error getting vector context: {e}")
+        
+        # Fallback to traditional memory if vector store fails
+        recent_messages = self._get_recent_messages(self.current_session_id, max_messages)
+        if recent_messages is not None:
+            context = "Previous conversation context:\n"
+            for msg in recent_messages:
+                context += f"{msg.role.capitalize()}: {msg.content}\n"
+            
+            return context
+        
+        return ""
+    
+    def get_conversation_summary(self) -> str:
+        """Get a summary of the current conversation"""
+        if not self.current_session_id:
+            return ""
+        try:
+            overview = self.store.session_overview(self.current_session_id)
+        except Exception as e:
+            print(f"Error loading conversation: {e}")
+            return ""
+        if overview is None:
+            return ""
+        
+        return overview['summary'] or self._describe_conversation(overview['message_count'], overview['topics'])
+    
+    @staticmethod
+    def _describe_conversation(message_count: int, topics: List[str]) -> str:
+        """Simple summary from the message count and the topics the store keeps per session"""
+        if message_count == 0:
+            return "No conversation yet."
+        
+        topic_str = ", ".join(topics[:5]) if topics else "general inquiry"
+        return f"Conversation with {message_count} messages about: {topic_str}"
+    
+    def load_conversation(self, session_id: str) -> bool:
+        """Load a specific conversation"""
+        conv = self._get_conversation(session_id)
+        if conv is not None:
+            self.current_session_id = session_id
+            return True
+        return False
+    
+    def get_history(self) -> List[Dict[str, Any]]:
+        """The current conversation's messages, as display dicts"""
+        conv = self._get_conversation(self.current_session_id) if self.current_session_id else None
+        if conv is None:
+            return []
+        return [
+            {
+                'role': msg.role,
+                'content': msg.content,
+                'timestamp': msg.timestamp
+            }
+            for msg in conv.messages
+        ]
+    
+    def get_all_conversations(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get list of conversations with metadata, most recent first"""
+        conversations_list = []
+        # Already most recent first, read in index order
+        for header in self.sessions.recent_sessions(limit):
+            conversations_list.append({
+                'session_id': header['session_id'],
+                'created_at': header['created_at'],
+                'last_updated': header['last_updated'],
+                'message_count': header['message_count'],
+                'summary': header['summary'] or self._describe_conversation(header['message_count'], header['topics'])
+            })
+        
+        return conversations_list
+    
+    def clear_current_conversation(self):
+        """Clear the current conversation"""
+        if self.current_session_id:
+            try:
+                self.store.delete_conversation(self.current_session_id)
+            except Exception as e:
+                print(f"Error deleting conversation: {e}")
+        
+        self.current_session_id = None
+    
+    def clear_all_conversations(self):
+        """Clear all conversations"""
+        self.current_session_id = None
+        try:
+            self.store.delete_all()
+        except Exception as e:
+            print(f"Error clearing conversations: {e}")
+    
+    def export_conversations(self, filepath: str, session_ids: Optional[List[str]] = None,
+                             since: Optional[str] = None, until: Optional[str] = None):
+        """Export conversations to newline-delimited JSON, gzipped when filepath ends in .gz"""
+        try:
+            result = archive.export_conversations(self.store, filepath, session_ids, since, until)
+            print(f"[ARCHIVE] Exported {result['exported']} conversations to {filepath}")
+            return True
+        except Exception as e:
+            print(f"Error exporting conversations: {e}")
+            return False
+    
+    def import_conversations(self, filepath: str) -> int:
+        """Import an export made by export_conversations; existing sessions are kept as they are"""
+        try:
+            return archive.import_conversations(self.store, filepath)
+        except Exception as e:
+            print(f"Error importing conversations: {e}")
+            return 0
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Get statistics about stored conversations"""
+        counts = self.store.count()
+        
+        return {
+            'total_conversations': counts['conversations'],
+            'total_messages': counts['messages'],
+            'current_session_id': self.current_session_id,
+            'memory_file_size': self.store.file_size()
+        }
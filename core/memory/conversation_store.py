@@ -0,0 +1,904 @@
+import os
+import json
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from dataclasses import dataclass
+
+@dataclass
+class Message:
+    """Represents a single message in a conversation"""
+    role: str  # 'user' or 'assistant'
+    content: str
+    timestamp: str
+    metadata: Optional[Dict[str, Any]] = None
+    message_id: Optional[str] = None  # Stable id assigned on creation; keys the message's context embedding
+
+@dataclass
+class Conversation:
+    """Represents a complete conversation session"""
+    session_id: str
+    messages: List[Message]
+    created_at: str
+    last_updated: str
+    summary: Optional[str] = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES conversations(session_id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+"""
+
+# Words a user message can contribute to its session's topic set for summaries
+SUMMARY_TOPICS = ('price', 'cost', 'product', 'chicken', 'farm', 'order', 'delivery')
+
+def _extract_topics(content: str) -> List[str]:
+    seen = []
+    for word in content.lower().split():
+        if word in SUMMARY_TOPICS and word not in seen:
+            seen.append(word)
+    return seen
+
+def _backfill_topics(conn: sqlite3.Connection):
+    conn.executemany(
+        INSERT_TOPIC,
+        [
+            (session_id, topic)
+            for session_id, content in conn.execute("SELECT session_id, content FROM messages WHERE role = 'user' ORDER BY id").fetchall()
+            for topic in _extract_topics(content)
+        ]
+    )
+
+# Applied in order on open; PRAGMA user_version records how many have run.
+# A step is either SQL or a callable taking the connection
+MIGRATIONS = (
+    # 1: the conversations table doubles as the session index: message count and the
+    # first/last message ids, which locate a session's rows without scanning messages
+    (
+        "ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE conversations ADD COLUMN first_message_id INTEGER",
+        "ALTER TABLE conversations ADD COLUMN last_message_id INTEGER",
+        """
+        UPDATE conversations SET
+            message_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = conversations.session_id),
+            first_message_id = (SELECT MIN(id) FROM messages m WHERE m.session_id = conversations.session_id),
+            last_message_id = (SELECT MAX(id) FROM messages m WHERE m.session_id = conversations.session_id)
+        """,
+    ),
+    # 2: caller-assigned message ids, known before the write is flushed
+    (
+        "ALTER TABLE messages ADD COLUMN message_id TEXT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_message_id ON messages(message_id)",
+    ),
+    # 3: session registry orderings, by last activity and by size
+    (
+        "CREATE INDEX IF NOT EXISTS idx_conversations_last_updated ON conversations(last_updated)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_size ON conversations(message_count)",
+    ),
+    # 4: aggregates kept current on every write, so the sidebar reads them in O(1):
+    # totals maintained by triggers (FK cascades fire them too) and per-session topic sets
+    (
+        """
+        CREATE TABLE memory_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            conversations INTEGER NOT NULL,
+            messages INTEGER NOT NULL
+        )
+        """,
+        "INSERT INTO memory_stats VALUES (1, (SELECT COUNT(*) FROM conversations), (SELECT COUNT(*) FROM messages))",
+        "CREATE TRIGGER stats_conversation_insert AFTER INSERT ON conversations BEGIN UPDATE memory_stats SET conversations = conversations + 1; END",
+        "CREATE TRIGGER stats_conversation_delete AFTER DELETE ON conversations BEGIN UPDATE memory_stats SET conversations = conversations - 1; END",
+        "CREATE TRIGGER stats_message_insert AFTER INSERT ON messages BEGIN UPDATE memory_stats SET messages = messages + 1; END",
+        "CREATE TRIGGER stats_message_delete AFTER DELETE ON messages BEGIN UPDATE memory_stats SET messages = messages - 1; END",
+        """
+        CREATE TABLE session_topics (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT NOT NULL REFERENCES conversations(session_id) ON DELETE CASCADE,
+            topic TEXT NOT NULL,
+            UNIQUE (session_id, topic)
+        )
+        """,
+        _backfill_topics,
+    ),
+)
+
+# Orderings list_conversations can serve straight from an index
+SESSION_ORDERS = {
+    'last_updated': "last_updated DESC",
+    'size': "message_count DESC"
+}
+
+FSYNC_POLICIES = {
+    'off': 'OFF',  # Leave syncing to the OS; fastest, may lose recent writes on power loss
+    'normal': 'NORMAL',  # Sync at checkpoints; a power loss can only drop the latest flushed batches
+    'full': 'FULL'  # Sync every flushed batch
+}
+
+INSERT_CONVERSATION = "INSERT OR IGNORE INTO conversations (session_id, created_at, last_updated, summary) VALUES (?, ?, ?, ?)"
+INSERT_MESSAGE = "INSERT INTO messages (session_id, role, content, timestamp, metadata, message_id) VALUES (?, ?, ?, ?, ?, ?)"
+# Runs right after INSERT_MESSAGE on the same connection, so last_insert_rowid() is that message
+TOUCH_CONVERSATION = """
+UPDATE conversations SET
+    last_updated = ?,
+    message_count = message_count + 1,
+    first_message_id = COALESCE(first_message_id, last_insert_rowid()),
+    last_message_id = last_insert_rowid()
+WHERE session_id = ?
+"""
+REINDEX_CONVERSATION = """
+UPDATE conversations SET
+    message_count = (SELECT COUNT(*) FROM messages WHERE session_id = ?1),
+    first_message_id = (SELECT MIN(id) FROM messages WHERE session_id = ?1),
+    last_message_id = (SELECT MAX(id) FROM messages WHERE session_id = ?1)
+WHERE session_id = ?1
+"""
+INSERT_TOPIC = "INSERT OR IGNORE INTO session_topics (session_id, topic) VALUES (?, ?)"
+DELETE_CONVERSATION = "DELETE FROM conversations WHERE session_id = ?"
+DELETE_ALL = "DELETE FROM conversations"
+
+def _encode_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    return json.dumps(metadata, ensure_ascii=False) if metadata is not None else None
+
+def _decode_message(role: str, content: str, timestamp: str, metadata: Optional[str], message_id: Optional[str]) -> Message:
+    return Message(role, content, timestamp, json.loads(metadata) if metadata else None, message_id)
+
+@dataclass
+class _CachedSession:
+    conversation: Conversation
+    message_ids: Tuple[Optional[int], Optional[int]]  # First and last stored message id the conversation holds
+    pending: int = 0  # Queued writes for the session that have not been flushed yet
+
+class ConversationStore:
+    """Append-only SQLite (WAL) storage for conversations with write-behind
+
+    Writes are queued in memory and return immediately. A background flusher
+    applies them in one transaction when ``flush_batch_size`` writes are
+    pending or ``flush_interval`` seconds have passed, so the request that
+    produced them never waits on disk. Each message is one INSERT into the
+    write-ahead log, which is checkpointed every ``checkpoint_interval``
+    writes; SQLite replays committed records on open after a crash.
+
+    Several processes can share one database file. Threads borrow connections
+    from a pool that keeps at most ``pool_size`` idle ones open, so short-lived
+    threads (Streamlit reruns, recycled server workers) never leave connections
+    behind. Write transactions take the database lock up front and wait up to
+    ``busy_timeout_ms`` for other writers, and readers never block writers. A
+    batch the database stays too busy for is kept queued and retried, never
+    dropped.
+
+    Nothing is read at startup. The conversations table is the session index:
+    besides the header it keeps each session's message count and first/last
+    message id, so listing sessions never touches message rows and a session's
+    messages are one range scan. Materialized sessions are kept in a bounded
+    LRU of ``session_cache_size`` entries that this process's writes update in
+    place; a cached session is revalidated against its indexed message ids and
+    only messages written by other processes since are read.
+    """
+
+    def __init__(self, db_path: str, checkpoint_interval: int = 200, flush_batch_size: int = 32,
+                 flush_interval: float = 1.0, fsync_policy: str = 'normal', busy_timeout_ms: int = 5000,
+                 session_cache_size: int = 32, pool_size: int = 4):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Expected one of: {', '.join(FSYNC_POLICIES)}")
+
+        self.db_path = db_path
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.flush_batch_size = max(1, flush_batch_size)
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.busy_timeout_ms = busy_timeout_ms
+        self.session_cache_size = max(1, session_cache_size)
+        self._writes_since_checkpoint = 0
+
+        self._sessions: "OrderedDict[str, _CachedSession]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+
+        # _condition guards the pending queue only; _write_lock serialises this process's writers
+        self._pending = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        self.pool_size = max(1, pool_size)
+        self._idle_connections: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._pool_closed = False
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._open()
+
+        self._flusher = threading.Thread(target=self._run_flusher, name="memory-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        # check_same_thread is off because pooled connections move between threads, one at a time
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={FSYNC_POLICIES[self.fsync_policy]}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _open(self):
+        """Check the database once, setting a corrupt file aside instead of failing to start"""
+        conn = None
+        try:
+            conn = self._connect()
+            status = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if status != "ok":
+                raise sqlite3.DatabaseError(status)
+        except sqlite3.DatabaseError as e:
+            corrupt_path = f"{self.db_path}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            print(f"[MEMORY] {self.db_path} failed its integrity check ({e}); moved to {corrupt_path}")
+            if conn is not None:
+                conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.db_path + suffix):
+                    os.replace(self.db_path + suffix, corrupt_path + suffix)
+            conn = self._connect()
+
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        conn.close()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Read inside the write lock so concurrent openers apply each migration once
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for step in statements:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version={number}")
+                print(f"[MEMORY] Applied schema migration {number}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection for the duration of the block, opening one when none is idle"""
+        with self._pool_lock:
+            conn = self._idle_connections.pop() if self._idle_connections else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                conn.close()
+                return
+        with self._pool_lock:
+            if not self._pool_closed and len(self._idle_connections) < self.pool_size:
+                self._idle_connections.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database write lock before doing any work"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def _enqueue(self, *statements, session_id: Optional[str] = None, entry: Optional[_CachedSession] = None):
+        """Queue statements that must be applied together, in order
+
+        ``entry`` is the cached session the write was already applied to, if any.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Conversation store is closed")
+            self._pending.append((session_id, entry, statements))
+            if len(self._pending) >= self.flush_batch_size:
+                self._condition.notify()
+
+    def _run_flusher(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.flush_batch_size:
+                    self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                kept = self.flush()
+            except Exception as e:
+                print(f"[MEMORY] Background flush failed: {e}")
+                kept = self.pending_writes()
+            if kept:
+                # The database refused the writes; back off instead of retrying in a tight loop
+                with self._condition:
+                    if not self._closed:
+                        self._condition.wait(self.flush_interval)
+
+    def flush(self) -> int:
+        """Apply every queued write now; returns how many stayed queued because the database refused them"""
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            kept = 0
+            try:
+                with self._transaction() as conn:
+                    written = [(session_id, entry, self._execute(conn, statements), True)
+                               for session_id, entry, statements in batch]
+            except sqlite3.OperationalError as e:
+                # Locked past busy_timeout_ms or the disk is unavailable; no record is at fault
+                kept = self._requeue(batch)
+                written = []
+                print(f"[MEMORY] Batch of {len(batch)} writes failed ({e}); kept queued for the next flush")
+            except sqlite3.Error as e:
+                # Retry one write at a time so a single bad record cannot hold up the whole batch
+                print(f"[MEMORY] Batch of {len(batch)} writes failed ({e}); retrying individually")
+                written = []
+                for index, (session_id, entry, statements) in enumerate(batch):
+                    try:
+                        with self._transaction() as conn:
+                            written.append((session_id, entry, self._execute(conn, statements), True))
+                    except sqlite3.OperationalError as e:
+                        kept = self._requeue(batch[index:])
+                        print(f"[MEMORY] {kept} writes kept queued for the next flush: {e}")
+                        break
+                    except sqlite3.Error as e:
+                        # A constraint or value error fails the same way on every retry
+                        print(f"[MEMORY] Dropped write {statements[0][0].split('(')[0].strip()}: {e}")
+                        written.append((session_id, entry, None, False))
+            self._mark_flushed(written)
+
+            self._writes_since_checkpoint += len(written)
+            if self._writes_since_checkpoint >= self.checkpoint_interval:
+                self._checkpoint()
+            return kept
+
+    def _requeue(self, writes) -> int:
+        """Put writes back at the head of the queue, ahead of anything queued since, so order is kept"""
+        with self._condition:
+            self._pending[:0] = writes
+        return len(writes)
+
+    @staticmethod
+    def _execute(conn: sqlite3.Connection, statements) -> Optional[int]:
+        """Run one queued write; returns the new message id when it inserted a message"""
+        message_id = None
+        for sql, params in statements:
+            cursor = conn.execute(sql, params)
+            if sql is INSERT_MESSAGE:
+                message_id = cursor.lastrowid
+        return message_id
+
+    def _mark_flushed(self, written):
+        """Settle cached sessions once their queued writes are committed (or dropped)
+
+        A cached session's message ids only move past messages it holds. A
+        cached copy read while the write was still queued lacks the message,
+        and one holding a dropped message has one too many; either is evicted
+        so the next load rereads the database.
+        """
+        with self._sessions_lock:
+            for session_id, entry, message_id, applied in written:
+                if entry is not None:
+                    entry.pending = max(0, entry.pending - 1)
+                cached = self._sessions.get(session_id) if session_id is not None else None
+                if cached is None:
+                    continue
+                if cached is entry:
+                    if not applied:
+                        del self._sessions[session_id]
+                    elif message_id is not None:
+                        first_id = entry.message_ids[0] if entry.message_ids[0] is not None else message_id
+                        entry.message_ids = (first_id, message_id)
+                elif applied and message_id is not None:
+                    del self._sessions[session_id]
+
+    def _cache(self, session_id: str, entry: _CachedSession):
+        with self._sessions_lock:
+            self._sessions[session_id] = entry
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.session_cache_size:
+                self._sessions.popitem(last=False)
+
+    def _checkpoint(self, mode: str = "PASSIVE", conn: Optional[sqlite3.Connection] = None):
+        # PASSIVE never waits on readers in other processes; it copies what it can
+        if conn is None:
+            with self._connection() as conn:
+                conn.execute(f"PRAGMA wal_checkpoint({mode})")
+        else:
+            conn.execute(f"PRAGMA wal_checkpoint({mode})")
+        self._writes_since_checkpoint = 0
+
+    def pending_writes(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _queued(self, *kinds: str) -> List[Tuple[str, tuple]]:
+        """Queued statements of the given kinds, oldest first
+
+        Aggregate reads add these to what they read from the database instead
+        of flushing first. Read the database before calling this: a write
+        flushed in between is then missed for one call, never counted twice.
+        """
+        with self._condition:
+            return [(sql, params) for _, _, statements in self._pending for sql, params in statements if sql in kinds]
+
+    def create_conversation(self, conversation: Conversation):
+        """Queue a new session; the conversation object becomes the cached copy"""
+        entry = _CachedSession(conversation, (None, None), pending=1)
+        self._cache(conversation.session_id, entry)
+        self._enqueue(
+            (INSERT_CONVERSATION, (conversation.session_id, conversation.created_at, conversation.last_updated, conversation.summary)),
+            session_id=conversation.session_id,
+            entry=entry
+        )
+
+    def append_message(self, session_id: str, message: Message):
+        """Queue one message together with its session index and topic updates, and add it to the cached session"""
+        with self._sessions_lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry.conversation.messages.append(message)
+                entry.conversation.last_updated = message.timestamp
+                entry.pending += 1
+        self._enqueue(
+            (INSERT_MESSAGE, (session_id, message.role, message.content, message.timestamp, _encode_metadata(message.metadata),
+                             message.message_id)),
+            (TOUCH_CONVERSATION, (message.timestamp, session_id)),
+            *[(INSERT_TOPIC, (session_id, topic)) for topic in (_extract_topics(message.content) if message.role == 'user' else ())],
+            session_id=session_id,
+            entry=entry
+        )
+
+    def delete_conversation(self, session_id: str):
+        with self._sessions_lock:
+            self._sessions.pop(session_id, None)
+        self._enqueue((DELETE_CONVERSATION, (session_id,)))
+
+    def delete_all(self):
+        with self._sessions_lock:
+            self._sessions.clear()
+        self._enqueue((DELETE_ALL, ()))
+
+    def _read_header(self, conn: sqlite3.Connection, session_id: str):
+        return conn.execute(
+            "SELECT created_at, last_updated, summary, first_message_id, last_message_id FROM conversations WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+
+    def _read_messages(self, conn: sqlite3.Connection, session_id: str, first_id: int, last_id: int) -> List[Message]:
+        return [
+            _decode_message(*message_row)
+            for message_row in conn.execute(
+                "SELECT role, content, timestamp, metadata, message_id FROM messages WHERE session_id = ? AND id BETWEEN ? AND ? ORDER BY id",
+                (session_id, first_id, last_id)
+            )
+        ]
+
+    def load_conversation(self, session_id: str) -> Optional[Conversation]:
+        """Return one session, from the LRU when it is still current, else from its indexed message range"""
+        with self._sessions_lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+                if entry.pending:
+                    # Ahead of the database already; nothing another process wrote can be newer
+                    return entry.conversation
+                known_ids = entry.message_ids
+
+        if entry is not None:
+            newer = None
+            with self._connection() as conn:
+                conn.execute("BEGIN")
+                try:
+                    row = self._read_header(conn, session_id)
+                    if row is not None and row[3] == known_ids[0] and (row[4] or 0) > (known_ids[1] or 0):
+                        # Another process appended; read only the messages after the cached ones
+                        newer = self._read_messages(conn, session_id, (known_ids[1] or 0) + 1, row[4])
+                finally:
+                    conn.execute("COMMIT")
+
+            with self._sessions_lock:
+                if row is None:
+                    self._sessions.pop(session_id, None)
+                    return None
+                if entry.pending or entry.message_ids != known_ids:
+                    return entry.conversation  # Written by this process meanwhile; already current
+                if newer is not None or (row[3], row[4]) == known_ids:
+                    conversation = entry.conversation
+                    if newer is not None:
+                        conversation.messages.extend(newer)
+                        entry.message_ids = (row[3], row[4])
+                    conversation.last_updated, conversation.summary = row[1], row[2]
+                    return conversation
+            # Messages were removed elsewhere; fall through to a full read
+
+        # Flush first so this process's queued writes for the session are visible
+        self.flush()
+        with self._connection() as conn:
+            # One read transaction so the header and messages come from the same snapshot
+            conn.execute("BEGIN")
+            try:
+                row = self._read_header(conn, session_id)
+                if row is None:
+                    return None
+                created_at, last_updated, summary, first_id, last_id = row
+                messages = self._read_messages(conn, session_id, first_id, last_id) if first_id is not None else []
+            finally:
+                conn.execute("COMMIT")
+
+        conversation = Conversation(session_id, messages, created_at, last_updated, summary)
+        self._cache(session_id, _CachedSession(conversation, (first_id, last_id)))
+        return conversation
+
+    def recent_messages(self, session_id: str, limit: int) -> Optional[List[Message]]:
+        """The last ``limit`` messages of a session without materializing the rest; None if it does not exist"""
+        with self._sessions_lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry.pending:
+                return entry.conversation.messages[-limit:] if limit > 0 else []
+        if entry is not None:
+            conversation = self.load_conversation(session_id)
+            if conversation is None:
+                return None
+            return conversation.messages[-limit:] if limit > 0 else []
+
+        self.flush()
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                if conn.execute("SELECT 1 FROM conversations WHERE session_id = ?", (session_id,)).fetchone() is None:
+                    return None
+                rows = conn.execute(
+                    "SELECT role, content, timestamp, metadata, message_id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (session_id, max(0, limit))
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return [_decode_message(*message_row) for message_row in reversed(rows)]
+
+    def list_conversations(self, order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Session headers with message counts and topics, read from the session index alone"""
+        sql = """
+        SELECT session_id, created_at, last_updated, summary, message_count,
+               (SELECT group_concat(topic) FROM (SELECT topic FROM session_topics t WHERE t.session_id = c.session_id ORDER BY t.id))
+        FROM conversations c
+        """
+        if order_by is not None:
+            if order_by not in SESSION_ORDERS:
+                raise ValueError(f"Unknown session order '{order_by}'. Expected one of: {', '.join(SESSION_ORDERS)}")
+            sql += f" ORDER BY {SESSION_ORDERS[order_by]}"
+        # No flush: listings may trail this process's queued writes by up to flush_interval
+        with self._connection() as conn:
+            rows = conn.execute(f"{sql} LIMIT ?", (-1 if limit is None else limit,)).fetchall()
+        return [
+            {
+                'session_id': session_id,
+                'created_at': created_at,
+                'last_updated': last_updated,
+                'summary': summary,
+                'message_count': message_count,
+                'topics': topics.split(',') if topics else []
+            }
+            for session_id, created_at, last_updated, summary, message_count, topics in rows
+        ]
+
+    def session_overview(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """One session's summary, message count and topics, without reading its messages
+
+        Messages still queued for the session are included without flushing.
+        """
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT summary, message_count FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            topics = [topic for topic, in conn.execute(
+                "SELECT topic FROM session_topics WHERE session_id = ? ORDER BY id", (session_id,)
+            )]
+        queued = [(sql, params) for sql, params in self._queued(INSERT_CONVERSATION, INSERT_MESSAGE, INSERT_TOPIC)
+                  if params[0] == session_id]
+        if row is None:
+            if not any(sql is INSERT_CONVERSATION for sql, _ in queued):
+                return None
+            row = (None, 0)
+        for sql, params in queued:
+            if sql is INSERT_TOPIC and params[1] not in topics:
+                topics.append(params[1])
+        message_count = row[1] + sum(sql is INSERT_MESSAGE for sql, _ in queued)
+        return {'summary': row[0], 'message_count': message_count, 'topics': topics}
+
+    def idle_sessions(self, idle_since: str, limit: Optional[int] = None) -> List[str]:
+        """Ids of sessions last updated before ``idle_since``, least recently active first
+
+        Not flushed first; a session touched by a queued write may still be listed.
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT session_id FROM conversations WHERE last_updated < ? ORDER BY last_updated LIMIT ?",
+                (idle_since, -1 if limit is None else limit)
+            ).fetchall()
+        return [session_id for session_id, in rows]
+
+    def expire_sessions(self, idle_since: str, limit: Optional[int] = None) -> List[str]:
+        """Delete sessions idle since before ``idle_since``; returns the ids this call removed
+
+        Selection and deletion share one write transaction, so when several
+        processes sweep at once each expired session is reported exactly once.
+        """
+        self.flush()
+        with self._write_lock:
+            with self._transaction() as conn:
+                expired = [session_id for session_id, in conn.execute(
+                    "SELECT session_id FROM conversations WHERE last_updated < ? ORDER BY last_updated LIMIT ?",
+                    (idle_since, -1 if limit is None else limit)
+                ).fetchall()]
+                conn.executemany(DELETE_CONVERSATION, [(session_id,) for session_id in expired])
+            self._writes_since_checkpoint += len(expired)
+
+        with self._sessions_lock:
+            for session_id in expired:
+                self._sessions.pop(session_id, None)
+        return expired
+
+    def compact(self, vacuum_free_ratio: float = 0.25) -> int:
+        """Fold the WAL back into the database and reclaim free pages once they pass ``vacuum_free_ratio``
+
+        Returns the number of bytes released on disk.
+        """
+        before = self.file_size()
+        self.flush()
+        with self._write_lock, self._connection() as conn:
+            self._checkpoint("TRUNCATE", conn)
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if page_count and free_pages / page_count >= vacuum_free_ratio:
+                # VACUUM rewrites the file and needs every other connection idle; retried on the next sweep
+                try:
+                    conn.execute("VACUUM")
+                    self._checkpoint("TRUNCATE", conn)
+                except sqlite3.OperationalError as e:
+                    print(f"[MEMORY] Skipped VACUUM: {e}")
+        return max(0, before - self.file_size())
+
+    def count(self) -> Dict[str, int]:
+        """Totals kept current by triggers plus queued inserts; one row read regardless of history size
+
+        Nothing is flushed, so the sidebar never waits on the write-behind
+        queue. Queued deletes only show once they are flushed.
+        """
+        with self._connection() as conn:
+            conversations, messages = conn.execute(
+                "SELECT conversations, messages FROM memory_stats WHERE id = 1"
+            ).fetchone()
+        queued = self._queued(INSERT_CONVERSATION, INSERT_MESSAGE)
+        return {
+            'conversations': conversations + sum(sql is INSERT_CONVERSATION for sql, _ in queued),
+            'messages': messages + sum(sql is INSERT_MESSAGE for sql, _ in queued)
+        }
+
+    def load_all(self) -> Dict[str, Conversation]:
+        """Load every conversation with its messages in insertion order"""
+        self.flush()
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conversations = {
+                    session_id: Conversation(session_id, [], created_at, last_updated, summary)
+                    for session_id, created_at, last_updated, summary in conn.execute(
+                        "SELECT session_id, created_at, last_updated, summary FROM conversations"
+                    )
+                }
+                rows = conn.execute(
+                    "SELECT session_id, role, content, timestamp, metadata, message_id FROM messages ORDER BY id"
+                )
+                for session_id, *message_row in rows:
+                    conversation = conversations.get(session_id)
+                    if conversation is not None:
+                        conversation.messages.append(_decode_message(*message_row))
+            finally:
+                conn.execute("COMMIT")
+        return conversations
+
+    def import_legacy_json(self, json_path: str) -> int:
+        """One-time import of a pre-journal conversations.json; the file is renamed once imported
+
+        Safe to race: a session whose header already exists is skipped along
+        with its messages, so concurrent importers never duplicate history.
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"[MEMORY] Could not import {json_path}: {e}")
+            return 0
+
+        imported = self.import_conversations(
+            dict(conv_data, session_id=session_id) for session_id, conv_data in data.items()
+        )
+
+        try:
+            os.replace(json_path, json_path + ".imported")
+        except FileNotFoundError:
+            pass  # Another process finished the import first
+        print(f"[MEMORY] Imported {imported} conversations from {json_path}")
+        return imported
+
+    def import_conversations(self, records: Iterable[Dict[str, Any]], batch_size: int = 100) -> int:
+        """Insert conversation records (session fields plus a ``messages`` list), ``batch_size`` per transaction
+
+        Records are consumed lazily, so an exported stream imports in constant
+        memory. A session whose id already exists is skipped with its messages,
+        which makes re-running an import safe.
+        """
+        imported = 0
+        batch = []
+        self.flush()
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                imported += self._import_batch(batch)
+                batch = []
+        if batch:
+            imported += self._import_batch(batch)
+        with self._write_lock:
+            self._checkpoint()
+        return imported
+
+    def _import_batch(self, records: List[Dict[str, Any]]) -> int:
+        imported = 0
+        with self._write_lock:
+            with self._transaction() as conn:
+                for record in records:
+                    session_id = record['session_id']
+                    cursor = conn.execute(
+                        INSERT_CONVERSATION,
+                        (session_id, record['created_at'], record['last_updated'], record.get('summary'))
+                    )
+                    if cursor.rowcount != 1:
+                        continue
+                    conn.executemany(
+                        INSERT_MESSAGE,
+                        [
+                            (session_id, msg['role'], msg['content'], msg['timestamp'], _encode_metadata(msg.get('metadata')),
+                             msg.get('message_id'))
+                            for msg in record['messages']
+                        ]
+                    )
+                    conn.execute(REINDEX_CONVERSATION, (session_id,))
+                    conn.executemany(
+                        INSERT_TOPIC,
+                        [
+                            (session_id, topic)
+                            for msg in record['messages'] if msg['role'] == 'user'
+                            for topic in _extract_topics(msg['content'])
+                        ]
+                    )
+                    imported += 1
+        return imported
+
+    def iter_conversations(self, session_ids: Optional[Iterable[str]] = None, since: Optional[str] = None,
+                           until: Optional[str] = None, start_after: Optional[str] = None) -> Iterator[Conversation]:
+        """Yield conversations one at a time in session id order, from one consistent snapshot
+
+        ``since``/``until`` bound last activity (ISO timestamps, until exclusive)
+        and ``start_after`` resumes after the last session id already handled.
+        Only one session's messages are held in memory at a time.
+        """
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("last_updated >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("last_updated < ?")
+            params.append(until)
+        if start_after is not None:
+            clauses.append("session_id > ?")
+            params.append(start_after)
+        wanted = set(session_ids) if session_ids is not None else None
+
+        self.flush()
+        # A connection of its own, so the snapshot stays open while the caller works between yields
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            headers = conn.execute(
+                "SELECT session_id, created_at, last_updated, summary, first_message_id, last_message_id FROM conversations"
+                + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+                + " ORDER BY session_id",
+                params
+            )
+            for session_id, created_at, last_updated, summary, first_id, last_id in headers:
+                if wanted is not None and session_id not in wanted:
+                    continue
+                messages = self._read_messages(conn, session_id, first_id, last_id) if first_id is not None else []
+                yield Conversation(session_id, messages, created_at, last_updated, summary)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def file_size(self) -> int:
+        """Size on disk of the database plus its uncheckpointed log"""
+        return sum(
+            os.path.getsize(self.db_path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(self.db_path + suffix)
+        )
+
+    def close(self):
+        """Drain queued writes, stop the flusher and checkpoint; safe to call more than once"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+
+        # Writes the database is still too busy for are retried a few times before giving up
+        for _ in range(3):
+            if not self.flush():
+                break
+        else:
+            print(f"[MEMORY] {self.pending_writes()} writes could not be saved before closing")
+        with self._write_lock:
+            try:
+                self._checkpoint("TRUNCATE")
+            finally:
+                with self._pool_lock:
+                    self._pool_closed = True
+                    idle, self._idle_connections = self._idle_connections, []
+                for conn in idle:
+                    conn.close()
+
+_stores: Dict[str, ConversationStore] = {}
+_stores_lock = threading.Lock()
+
+def get_conversation_store(db_path: str, **options) -> ConversationStore:
+    """Return the process-wide store for ``db_path`` so every session shares one flusher"""
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ConversationStore(db_path, **options)
+            _stores[key] = store
+        return store
@@ -0,0 +1,101 @@
+import os
+import atexit
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from .conversation_store import ConversationStore
+
+# Called with the session ids a sweep expired and the idle cutoff it used
+ExpiryListener = Callable[[List[str], str], object]
+
+class RetentionService:
+    """Background thread that expires idle sessions and compacts the store
+
+    Every ``interval`` seconds, sessions with no activity for ``ttl_minutes``
+    are deleted from the store in batches of ``batch_size``. Listeners, such
+    as the conversation context index, are then told which sessions went, and
+    the database is checkpointed and vacuumed once enough pages are free.
+    Retention no longer depends on the owning tab exiting cleanly.
+    """
+
+    def __init__(self, store: ConversationStore, ttl_minutes: float, interval: float = 300.0,
+                 batch_size: int = 500, vacuum_free_ratio: float = 0.25):
+        self.store = store
+        self.ttl_minutes = ttl_minutes
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.vacuum_free_ratio = vacuum_free_ratio
+        self._listeners: Set[ExpiryListener] = set()
+        self._listeners_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'sweeps': 0, 'sessions_expired': 0, 'bytes_reclaimed': 0}
+
+    def add_listener(self, listener: ExpiryListener):
+        """Register a callback for expired sessions; registering the same one twice is a no-op"""
+        with self._listeners_lock:
+            self._listeners.add(listener)
+
+    def start(self):
+        if self.ttl_minutes <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-retention", daemon=True)
+        self._thread.start()
+        print(f"[RETENTION] Expiring sessions idle for {self.ttl_minutes} minutes, every {self.interval:.0f}s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[RETENTION] Sweep failed: {e}")
+
+    def sweep(self) -> List[str]:
+        """Expire every idle session now, then compact; returns the expired session ids"""
+        idle_since = (datetime.now() - timedelta(minutes=self.ttl_minutes)).isoformat()
+        expired = []
+        while not self._stop.is_set():
+            batch = self.store.expire_sessions(idle_since, self.batch_size)
+            expired.extend(batch)
+            if len(batch) < self.batch_size:
+                break
+
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        # Listeners run even when this process expired nothing; another process may have
+        for listener in listeners:
+            try:
+                listener(expired, idle_since)
+            except Exception as e:
+                print(f"[RETENTION] Expiry listener failed: {e}")
+
+        reclaimed = self.store.compact(self.vacuum_free_ratio) if expired else 0
+        self.stats['sweeps'] += 1
+        self.stats['sessions_expired'] += len(expired)
+        self.stats['bytes_reclaimed'] += reclaimed
+        if expired:
+            print(f"[RETENTION] Expired {len(expired)} idle sessions, reclaimed {reclaimed} bytes")
+        return expired
+
+_services: Dict[str, RetentionService] = {}
+_services_lock = threading.Lock()
+
+def get_retention_service(store: ConversationStore, **options) -> RetentionService:
+    """Return the one retention service for ``store``, started on first use"""
+    with _services_lock:
+        key = os.path.abspath(store.db_path)
+        service = _services.get(key)
+        if service is None:
+            service = RetentionService(store, **options)
+            _services[key] = service
+            service.start()
+            # Stop before the store's own atexit close, which was registered earlier and so runs later
+            atexit.register(service.stop)
+        return service
@@ -0,0 +1,78 @@
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from .conversation_store import Conversation, ConversationStore
+
+# Crockford base32: no I, L, O or U, so ids survive being read aloud or retyped
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+class SessionIdGenerator:
+    """Issues ULID-style ids: a 48-bit millisecond timestamp followed by 80 random bits
+
+    Ids sort by creation time, and 80 random bits make two workers starting a
+    session in the same millisecond practically never collide. Within one
+    process, ids issued in the same millisecond increment the random part, so
+    they stay strictly increasing.
+    """
+
+    def __init__(self, prefix: str = "session_"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def __call__(self) -> str:
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms <= self._last_ms:
+                now_ms = self._last_ms
+                self._last_random += 1
+                if self._last_random >> _RANDOM_BITS:
+                    # Random part exhausted within one millisecond; borrow the next one
+                    now_ms += 1
+                    self._last_random = secrets.randbits(_RANDOM_BITS)
+            else:
+                self._last_random = secrets.randbits(_RANDOM_BITS)
+            self._last_ms = now_ms
+            return f"{self.prefix}{_encode(now_ms, 10)}{_encode(self._last_random, 16)}"
+
+new_session_id = SessionIdGenerator()
+
+class SessionRegistry:
+    """Creates sessions and answers listing and eviction queries from the store's session index
+
+    The conversations table is indexed by last activity and by message count,
+    so the most recent, largest or idle sessions are read in index order
+    instead of sorting every session on each call.
+    """
+
+    def __init__(self, store: ConversationStore):
+        self.store = store
+
+    def create_session(self) -> Conversation:
+        now = datetime.now().isoformat()
+        conversation = Conversation(session_id=new_session_id(), messages=[], created_at=now, last_updated=now)
+        self.store.create_conversation(conversation)
+        return conversation
+
+    def recent_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Session headers, most recently active first"""
+        return self.store.list_conversations(order_by='last_updated', limit=limit)
+
+    def largest_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Session headers, most messages first"""
+        return self.store.list_conversations(order_by='size', limit=limit)
+
+    def idle_sessions(self, idle_since: str, limit: Optional[int] = None) -> List[str]:
+        """Ids of sessions with no activity since ``idle_since`` (ISO timestamp), least recent first"""
+        return self.store.idle_sessions(idle_since, limit)
@@ -0,0 +1,277 @@
+"""
+Shared Kazi Farms HR vocabulary.
+
+The vocabulary lives in one versioned JSON file (``Settings.VOCABULARY_PATH``)
+and is compiled once per process into lookup sets and a phrase automaton that
+every agent shares. A background watcher recompiles the file when it changes
+and swaps the compiled artifact in place, so edits apply without a restart.
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from config import Settings
+
+
+class PhraseAutomaton:
+    """Aho-Corasick automaton reporting every phrase that occurs in a text"""
+
+    def __init__(self, phrases):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [frozenset()]
+
+        outputs: List[Set[str]] = [set()]
+        for phrase in phrases:
+            if not phrase:
+                continue
+            node = 0
+            for char in phrase:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                node = next_node
+            outputs[node].add(phrase)
+
+        # Breadth-first pass to wire failure links and merge suffix outputs
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                outputs[child] |= outputs[self._fail[child]]
+
+        self._output = [frozenset(found) for found in outputs]
+
+    def find_all(self, text: str) -> Set[str]:
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found: Set[str] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found |= output[node]
+        return found
+
+
+class QuestionPatternSet:
+    """Matches every ``a.*b``-style question pattern against a text in one pass
+
+    Each pattern is split into its literal pieces. One automaton pass finds the
+    patterns whose longest piece occurs in the text, and only those candidates
+    are checked for their pieces appearing in order. Patterns that are not
+    plain ``.*``-joined literals fall back to a compiled regex search.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        self._pieces: List[Optional[Tuple[str, ...]]] = []
+        self._by_anchor: Dict[str, List[int]] = {}
+        self._regex_only: List[Tuple[int, re.Pattern]] = []
+
+        for index, pattern in enumerate(self.patterns):
+            pieces = pattern.split('.*')
+            if not all(pieces) or any(re.escape(piece) != piece for piece in pieces):
+                self._pieces.append(None)
+                self._regex_only.append((index, re.compile(pattern)))
+                continue
+            self._pieces.append(tuple(pieces))
+            self._by_anchor.setdefault(max(pieces, key=len), []).append(index)
+
+        self._automaton = PhraseAutomaton(self._by_anchor)
+
+    def match_all(self, text: str) -> List[str]:
+        """Return every matching pattern, in vocabulary order"""
+        matched: Set[int] = set()
+        # '.' does not cross newlines, so each line is matched on its own
+        for line in text.split('\n'):
+            for anchor in self._automaton.find_all(line):
+                for index in self._by_anchor[anchor]:
+                    if index not in matched and self._contains_in_order(line, self._pieces[index]):
+                        matched.add(index)
+        for index, regex in self._regex_only:
+            if regex.search(text):
+                matched.add(index)
+        return [self.patterns[index] for index in sorted(matched)]
+
+    @staticmethod
+    def _contains_in_order(text: str, pieces: Tuple[str, ...]) -> bool:
+        position = 0
+        for piece in pieces:
+            position = text.find(piece, position)
+            if position < 0:
+                return False
+            position += len(piece)
+        return True
+
+
+class DomainVocabulary:
+    """Compiled, read-only view of the vocabulary file"""
+
+    def __init__(self, data: Dict, path: str = "", mtime: float = 0.0):
+        self.path = path
+        self.mtime = mtime
+        self.version = data.get('version', 0)
+
+        self.query_types: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (query_type, tuple(keywords)) for query_type, keywords in data.get('query_types', {}).items()
+        )
+        self.extraction: Dict[str, Tuple[str, ...]] = {
+            field: tuple(terms) for field, terms in data.get('extraction', {}).items()
+        }
+        self.personal_identity = tuple(data.get('personal_identity', []))
+        self.personal_greeting = tuple(data.get('personal_greeting', []))
+        self.hr_contact = tuple(data.get('hr_contact', []))
+        # Whole-message small talk phrases mapped to their kind (greeting, thanks, farewell)
+        self.small_talk: Dict[str, str] = {
+            phrase: kind for kind, phrases in data.get('small_talk', {}).items() for phrase in phrases
+        }
+        # Phrases that mark a message as clearly unrelated to HR; the router only falls back on these
+        self.off_topic = frozenset(data.get('off_topic', []))
+        self.relevance_keywords = frozenset(data.get('relevance_keywords', []))
+        self.content_keywords = frozenset(data.get('content_keywords', []))
+        self.stop_words = frozenset(data.get('stop_words', []))
+        self.domain_keywords: Dict[str, Tuple[str, ...]] = {
+            domain: tuple(terms) for domain, terms in data.get('domain_keywords', {}).items()
+        }
+        self.domain_terms = frozenset(term for terms in self.domain_keywords.values() for term in terms)
+        self.question_patterns = QuestionPatternSet(data.get('question_patterns', []))
+        self.overlap_keywords: Dict[str, FrozenSet[str]] = {
+            group: frozenset(terms) for group, terms in data.get('overlap_keywords', {}).items()
+        }
+        self.phrase_boosts = tuple((phrase, float(boost)) for phrase, boost in data.get('phrase_boosts', []))
+        self.general_boosts = tuple((keyword, float(boost)) for keyword, boost in data.get('general_boosts', []))
+        self.suggestion_topics: Dict[str, Tuple[str, ...]] = {
+            topic: tuple(words) for topic, words in data.get('suggestion_topics', {}).items()
+        }
+        # Labelled example questions per query type, encoded into the intent classifier's centroids
+        self.intent_examples: Dict[str, Tuple[str, ...]] = {
+            intent: tuple(examples) for intent, examples in data.get('intent_examples', {}).items()
+        }
+
+        # Any of these in a message means it may be answerable from the HR documents
+        topic_terms = set(self.hr_contact) | self.relevance_keywords | self.content_keywords | self.domain_terms
+        for terms in self.extraction.values():
+            topic_terms.update(terms)
+        self.topic_terms = frozenset(topic_terms)
+        
+        phrases = set(self.personal_identity) | set(self.personal_greeting) | set(self.topic_terms) | self.off_topic
+        for _, keywords in self.query_types:
+            phrases.update(keywords)
+        for terms in self.overlap_keywords.values():
+            phrases |= terms
+        phrases.update(phrase for phrase, _ in self.phrase_boosts)
+        phrases.update(keyword for keyword, _ in self.general_boosts)
+        for words in self.suggestion_topics.values():
+            phrases.update(words)
+        self.phrases = frozenset(phrases)
+        self._automaton = PhraseAutomaton(sorted(self.phrases))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'DomainVocabulary':
+        mtime = os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data, path=path, mtime=mtime)
+
+    def find_terms(self, text: str) -> Set[str]:
+        """Return every vocabulary phrase occurring in ``text`` (expected lowercase)"""
+        return self._automaton.find_all(text)
+
+    def first_query_type(self, hits: Set[str]) -> Optional[str]:
+        for query_type, keywords in self.query_types:
+            for keyword in keywords:
+                if keyword in hits:
+                    return query_type
+        return None
+
+    def first_extracted(self, field: str, hits: Set[str]) -> Optional[str]:
+        for term in self.extraction.get(field, ()):
+            if term in hits:
+                return term
+        return None
+
+    def is_relevant(self, hits: Set[str]) -> bool:
+        return not self.relevance_keywords.isdisjoint(hits)
+    
+    def mentions_topic(self, hits: Set[str]) -> bool:
+        return not self.topic_terms.isdisjoint(hits)
+
+    def mentions_off_topic(self, hits: Set[str]) -> bool:
+        return not self.off_topic.isdisjoint(hits)
+
+    def suggestion_topic(self, hits: Set[str]) -> Optional[str]:
+        for topic, words in self.suggestion_topics.items():
+            if any(word in hits for word in words):
+                return topic
+        return None
+
+
+class VocabularyWatcher(threading.Thread):
+    """Polls the vocabulary file and hot-swaps the compiled artifact on change"""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(name="vocabulary-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._failed_mtime = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            mtime = None
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime != get_vocabulary().mtime and mtime != self._failed_mtime:
+                    reload_vocabulary(self.path)
+            except Exception as e:
+                # Remember the broken revision so it is reported once, not on every poll
+                self._failed_mtime = mtime
+                print(f"[VOCABULARY] Reload failed, keeping version {get_vocabulary().version}: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_vocabulary: Optional[DomainVocabulary] = None
+_watcher: Optional[VocabularyWatcher] = None
+_lock = threading.Lock()
+
+
+def reload_vocabulary(path: Optional[str] = None) -> DomainVocabulary:
+    """Compile the vocabulary file and atomically publish it to all agents"""
+    global _vocabulary
+    vocabulary = DomainVocabulary.from_file(path or Settings.VOCABULARY_PATH)
+    _vocabulary = vocabulary
+    print(f"[VOCABULARY] Loaded version {vocabulary.version} ({len(vocabulary.phrases)} phrases)")
+    return vocabulary
+
+
+def get_vocabulary() -> DomainVocabulary:
+    """Return the shared compiled vocabulary, compiling it on first use"""
+    global _watcher
+    vocabulary = _vocabulary
+    if vocabulary is not None:
+        return vocabulary
+
+    with _lock:
+        if _vocabulary is None:
+            reload_vocabulary()
+            if Settings.VOCABULARY_RELOAD_SECONDS and _watcher is None:
+                _watcher = VocabularyWatcher(Settings.VOCABULARY_PATH, Settings.VOCABULARY_RELOAD_SECONDS)
+                _watcher.start()
+        return _vocabulary
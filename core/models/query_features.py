@@ -0,0 +1,78 @@
+import re
+from functools import cached_property
+from typing import List, Optional, Set
+from core.models.domain_vocabulary import DomainVocabulary, get_vocabulary
+
+def preprocess_text(text: str, stop_words) -> str:
+    """Lowercase, drop punctuation, stop words and single characters"""
+    if not text:
+        return ""
+
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    tokens = text.split()
+    tokens = [token for token in tokens if token not in stop_words and len(token) > 1]
+
+    return ' '.join(tokens)
+
+class QueryFeatures:
+    """Everything the pipeline derives from one user message, computed once per request
+
+    The lowercase text and its vocabulary hits are computed up front; the
+    processed text, keyword hits and question pattern hits are computed on
+    first access, so stages that stop early never pay for them.
+    """
+
+    def __init__(self, query: str, vocabulary: Optional[DomainVocabulary] = None):
+        self.vocabulary = vocabulary or get_vocabulary()
+        self.original = query
+        self.normalized = query.lower()
+        self.stripped = self.normalized.strip()
+        self.vocabulary_hits: Set[str] = self.vocabulary.find_terms(self.normalized)
+
+    @cached_property
+    def processed(self) -> str:
+        return preprocess_text(self.original, self.vocabulary.stop_words)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return self.processed.split()
+
+    @cached_property
+    def keyword_hits(self) -> Set[str]:
+        """Domain keywords found in the processed text"""
+        return self.vocabulary.find_terms(self.processed) & self.vocabulary.domain_terms
+
+    @cached_property
+    def pattern_hits(self) -> List[str]:
+        """Every question pattern the query matches, in vocabulary order"""
+        return self.vocabulary.question_patterns.match_all(self.normalized)
+
+    @property
+    def is_personal_identity(self) -> bool:
+        return any(keyword in self.vocabulary_hits for keyword in self.vocabulary.personal_identity)
+
+    @property
+    def is_personal_greeting(self) -> bool:
+        return any(keyword in self.vocabulary_hits for keyword in self.vocabulary.personal_greeting)
+
+    @property
+    def is_hr_contact(self) -> bool:
+        return any(keyword in self.vocabulary_hits for keyword in self.vocabulary.hr_contact)
+
+    @property
+    def is_relevant(self) -> bool:
+        return self.vocabulary.is_relevant(self.vocabulary_hits)
+
+    @property
+    def mentions_topic(self) -> bool:
+        return self.vocabulary.mentions_topic(self.vocabulary_hits)
+
+    @property
+    def mentions_off_topic(self) -> bool:
+        return self.vocabulary.mentions_off_topic(self.vocabulary_hits)
+
+    @cached_property
+    def small_talk(self) -> Optional[str]:
+        """Small talk kind when the whole message is a greeting, thanks or farewell"""
+        return self.vocabulary.small_talk.get(' '.join(re.sub(r'[^\w\s]', ' ', self.normalized).split()))
@@ -0,0 +1,221 @@
+"""
+Headless HTTP API for the Kazi Farms Chatbot, served alongside the Streamlit UI
+"""
+import json
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+import anyio
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from backend import get_chat_service
+from config import Settings
+from core.memory.conversation_memory import ConversationMemory
+
+class RequestStats:
+    """Request counts and latency for this worker, for throughput measurements"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += int(failed)
+            self.total_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = time.time() - self.started
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'requests_per_second': self.requests / uptime if uptime else 0.0,
+                'average_latency_seconds': self.total_seconds / self.requests if self.requests else 0.0,
+                'uptime_seconds': uptime
+            }
+
+stats = RequestStats()
+# Caps how many pipeline calls run at once in this worker; the event loop never blocks on them
+_pipeline_slots: Optional[anyio.CapacityLimiter] = None
+
+def _open_memory(session_id: Optional[str]) -> Optional[ConversationMemory]:
+    """Memory for the requested session, a new session when none was given, or None if it does not exist"""
+    memory = ConversationMemory(vector_service=get_chat_service().vector_service)
+    if session_id is None:
+        memory.start_new_conversation()
+        return memory
+    return memory if memory.load_conversation(session_id) else None
+
+async def _read_chat_request(request: Request):
+    if not getattr(request.app.state, 'ready', False):
+        # A pipeline that failed at startup is not retried per request; /health reports why
+        return None, JSONResponse({'error': "Chat pipeline is not available"}, status_code=503)
+
+    try:
+        body = await request.json()
+    except ValueError:
+        # Invalid JSON, or a body that is not valid UTF-8
+        return None, JSONResponse({'error': "Request body must be JSON"}, status_code=400)
+
+    message = body.get('message') if isinstance(body, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        return None, JSONResponse({'error': "'message' must be a non-empty string"}, status_code=400)
+    if len(message) > Settings.API_MAX_MESSAGE_CHARS:
+        return None, JSONResponse({'error': f"'message' is longer than {Settings.API_MAX_MESSAGE_CHARS} characters"}, status_code=413)
+    session_id = body.get('session_id')
+    if session_id is not None and not isinstance(session_id, str):
+        return None, JSONResponse({'error': "'session_id' must be a string"}, status_code=400)
+
+    try:
+        memory = await run_in_threadpool(_open_memory, session_id)
+    except Exception as e:
+        print(f"[API] Could not open session memory: {e}")
+        return None, JSONResponse({'error': "Error processing your request"}, status_code=500)
+    if memory is None:
+        return None, JSONResponse({'error': f"Unknown session '{session_id}'"}, status_code=404)
+    return (memory, message), None
+
+def _answer(memory: ConversationMemory, message: str, on_token=None) -> Dict[str, Any]:
+    """Run one turn through the shared pipeline and record both sides in memory"""
+    memory.add_message('user', message)
+    conversation_context = memory.get_conversation_context(max_messages=6)
+    response = get_chat_service().process_query(
+        message, conversation_context, session_id=memory.current_session_id, on_token=on_token
+    )
+    memory.add_message('assistant', response['result'])
+    return {
+        'session_id': memory.current_session_id,
+        'answer': response['result'],
+        'confidence': response.get('confidence', 0),
+        'route': response.get('route')
+    }
+
+async def chat(request: Request):
+    parsed, error = await _read_chat_request(request)
+    if error is not None:
+        return error
+
+    start = time.perf_counter()
+    stats.begin()
+    failed = False
+    try:
+        result = await anyio.to_thread.run_sync(_answer, *parsed, limiter=_pipeline_slots)
+        return JSONResponse(result)
+    except Exception as e:
+        failed = True
+        print(f"[API] Chat request failed: {e}")
+        return JSONResponse({'error': "Error processing your request"}, status_code=500)
+    finally:
+        stats.end(time.perf_counter() - start, failed)
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def chat_stream(request: Request):
+    """Server-sent events: ``token`` events while the LLM answers, then one ``done`` event"""
+    parsed, error = await _read_chat_request(request)
+    if error is not None:
+        return error
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    streamed = []
+
+    def on_token(token: str):
+        streamed.append(token)
+        loop.call_soon_threadsafe(queue.put_nowait, ('token', token))
+
+    async def run_turn():
+        start = time.perf_counter()
+        stats.begin()
+        failed = False
+        try:
+            result = await anyio.to_thread.run_sync(_answer, *parsed, on_token, limiter=_pipeline_slots)
+            if not streamed:
+                # Routed and fallback answers never reach the LLM; send them as one token
+                await queue.put(('token', result['answer']))
+            await queue.put(('done', result))
+        except Exception as e:
+            failed = True
+            print(f"[API] Streaming chat request failed: {e}")
+            await queue.put(('error', {'error': "Error processing your request"}))
+        finally:
+            stats.end(time.perf_counter() - start, failed)
+
+    async def events():
+        task = asyncio.create_task(run_turn())
+        try:
+            while True:
+                event, data = await queue.get()
+                yield _sse(event, data)
+                if event != 'token':
+                    break
+        finally:
+            await task
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={'Cache-Control': "no-cache"})
+
+async def health(request: Request):
+    ready = getattr(request.app.state, 'ready', False)
+    body = {
+        'status': "ok" if ready else "starting",
+        'error': getattr(request.app.state, 'startup_error', None),
+        'stats': stats.snapshot()
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    global _pipeline_slots
+    _pipeline_slots = anyio.CapacityLimiter(Settings.API_MAX_CONCURRENCY)
+    app.state.ready = False
+    app.state.startup_error = None
+    # Load the index, models and agents before taking traffic; every request then shares them
+    try:
+        await run_in_threadpool(get_chat_service)
+        app.state.ready = True
+        print(f"[API] Pipeline ready; up to {Settings.API_MAX_CONCURRENCY} concurrent requests per worker")
+    except Exception as e:
+        app.state.startup_error = str(e)
+        print(f"[API] Pipeline failed to initialize: {e}")
+    yield
+
+app = Starlette(
+    routes=[
+        Route('/health', health, methods=['GET']),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST'])
+    ],
+    lifespan=lifespan
+)
+
+def main():
+    """Serve the API with uvicorn; each worker process preloads its own pipeline"""
+    import uvicorn
+
+    uvicorn.run(
+        "frontend.http_api:app",
+        host=Settings.API_HOST,
+        port=Settings.API_PORT,
+        workers=Settings.API_WORKERS
+    )
+
+if __name__ == "__main__":
+    main()
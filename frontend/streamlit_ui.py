@@ -1,6 +1,6 @@
 import streamlit as st
 import time
-from backend import ChatService
+from backend import get_chat_service
 from core.memory.memory_manager import MemoryManager
 from config import Settings
 
@@ -14,8 +14,8 @@ class KaziFarmFrontend:
     def initialize_chatbot(self):
         """Initialize the chatbot with error handling"""
         try:
-            self.chatbot = ChatService()
-            self.chatbot.initialize()
+            # Built once per process and shared by every session and rerun
+            self.chatbot = get_chat_service()
             # Initialize memory manager with vector service
             self.memory_manager = MemoryManager(
                 auto_cleanup=self.settings.AUTO_CLEANUP_ENABLED,
@@ -77,7 +77,9 @@ class KaziFarmFrontend:
         
         # Generate response
         try:
-            response = self.chatbot.get_answer_with_sources(user_prompt, conversation_context)
+            response = self.chatbot.get_answer_with_sources(
+                user_prompt, conversation_context, session_id=self.memory_manager.current_session_id
+            )
             
             # Display assistant response
             st.chat_message('assistant').markdown(response)
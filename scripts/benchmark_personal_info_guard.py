@@ -0,0 +1,77 @@
+"""
+Micro-benchmark for PersonalInfoGuard: the compiled, pre-filtered classify()
+against the original one-re.search-per-pattern loop
+
+Run from the repository root:
+    python -m scripts.benchmark_personal_info_guard [--queries 50000] [--repeat 5]
+
+Prints the best per-query time of each implementation for HR questions and for
+personal questions, and checks that both give the same answer on every query.
+"""
+import sys
+import random
+import timeit
+import argparse
+from backend.personal_info_guard import PersonalInfoGuard
+# The regression test owns the reference implementation, so the benchmark and the test compare against the same one
+from tests.test_personal_info_guard import per_pattern_classify
+
+HR_QUESTIONS = [
+    "what is the salary of a management trainee",
+    "how much house allowance do i get in panchagarh",
+    "can i carry forward my annual leave",
+    "how is the production bonus calculated for hatchery staff",
+    "hr email",
+    "when is the yearly salary increment",
+    "is there a transport allowance for field staff",
+    "maternity leave policy",
+    "who approves medical reimbursement",
+    "gross salary structure for sales person",
+]
+
+PERSONAL_QUESTIONS = [
+    "who am i",
+    "who are you",
+    "tell me about myself",
+    "what is my name",
+    "show my profile information",
+    "how are you",
+    "how's it going",
+    "what's up",
+    "hi, how are you doing today",
+    "are you okay",
+]
+
+def _time_per_query(fn, queries, repeat: int) -> float:
+    timer = timeit.Timer(lambda: [fn(query) for query in queries])
+    return min(timer.repeat(repeat=repeat, number=1)) / len(queries)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PersonalInfoGuard.classify against per-pattern search")
+    parser.add_argument('--queries', type=int, default=50000, help="Queries per workload")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per measurement; the best is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    guard = PersonalInfoGuard()
+    rng = random.Random(args.seed)
+    workloads = {
+        'HR questions': [rng.choice(HR_QUESTIONS) for _ in range(args.queries)],
+        'personal questions': [rng.choice(PERSONAL_QUESTIONS) for _ in range(args.queries)],
+    }
+
+    mismatches = 0
+    for name, queries in workloads.items():
+        mismatches += sum(guard.classify(query) != per_pattern_classify(guard, query) for query in queries)
+        before = _time_per_query(lambda query: per_pattern_classify(guard, query), queries, args.repeat)
+        after = _time_per_query(guard.classify, queries, args.repeat)
+        print(f"[BENCHMARK] {name:<20} per-pattern {before * 1e6:6.1f} us -> classify {after * 1e6:6.1f} us "
+              f"({before / after:.1f}x)")
+
+    if mismatches:
+        print(f"[BENCHMARK] {mismatches} queries classified differently")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
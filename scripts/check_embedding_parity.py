@@ -0,0 +1,61 @@
+"""
+Parity check for the ONNX embedding runtimes against the torch reference
+
+Run from the repository root:
+    python -m scripts.check_embedding_parity [--runtime onnx] [--runtime onnx-int8]
+
+Embeds a fixed sample of policy passages and user queries on each runtime and
+exits non-zero when any text's cosine similarity to its torch embedding falls
+below the runtime's bound in RUNTIME_PARITY_MIN_COSINE.
+"""
+import sys
+import argparse
+from backend.embedding_service import RUNTIME_PARITY_MIN_COSINE, compare_runtimes
+
+# Indexed passages: long, number-heavy policy text like the HR corpus
+CORPUS_SAMPLE = [
+    "Management trainees are placed in job group 3 and receive a basic salary of 35,000 BDT per month during the first year.",
+    "House rent allowance is paid at 50 percent of basic salary for employees posted outside Dhaka.",
+    "Employees are entitled to 20 days of earned leave per calendar year; unused leave may be carried forward up to 60 days.",
+    "The production bonus for hatchery staff is calculated monthly from the hatchability rate against the farm target.",
+    "Field staff who use their own motorcycle receive a fuel allowance on submission of a monthly travel log.",
+    "Medical expenses for management employees are reimbursed up to the annual limit set by their job group.",
+    "Salary revisions take effect from the first of January following the annual performance appraisal.",
+    "Requests for maternity leave must be submitted to HR at least four weeks before the expected start date.",
+    "The HR department can be reached at the head office, Monday to Thursday, 9:00 to 17:00.",
+    "Two festival bonuses, each equal to one month's basic salary, are paid before Eid-ul-Fitr and Eid-ul-Adha.",
+]
+
+# Short user queries, including misspellings and mixed language seen in chat logs
+QUERY_SAMPLE = [
+    "what is the salary of a management trainee",
+    "how much house allowance do i get in panchagarh",
+    "can i carry forward my annual leave",
+    "production bonus hatchery",
+    "hr email",
+    "salry increment date",
+    "is there a transport allowance for field staff?",
+    "maternity leave policy",
+    "eid bonus kobe dibe",
+    "who approves medical reimbursement",
+]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check ONNX embedding runtimes against the torch reference")
+    parser.add_argument('--runtime', action='append', choices=sorted(RUNTIME_PARITY_MIN_COSINE),
+                        help="Runtime to check (repeatable; default: all)")
+    args = parser.parse_args()
+
+    texts = CORPUS_SAMPLE + QUERY_SAMPLE
+    failed = False
+    for runtime in args.runtime or sorted(RUNTIME_PARITY_MIN_COSINE):
+        bound = RUNTIME_PARITY_MIN_COSINE[runtime]
+        result = compare_runtimes(texts, runtime)
+        passed = result['min_cosine'] >= bound
+        failed = failed or not passed
+        print(f"[PARITY] {runtime}: min cosine {result['min_cosine']:.5f}, mean {result['mean_cosine']:.5f} "
+              f"over {len(texts)} texts (bound {bound}) - {'ok' if passed else 'FAILED'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
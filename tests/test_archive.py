@@ -0,0 +1,82 @@
+"""
+Conversation archive export: an export interrupted softly (exception) or hard
+(truncated partial file) and then resumed must equal one uninterrupted export.
+
+Run from the repository root with: python -m pytest tests
+"""
+import os
+import pytest
+from core.memory import archive
+from core.memory.conversation_store import Conversation, ConversationStore, Message
+
+SESSIONS = 120
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.db"))
+    for index in range(SESSIONS):
+        session_id = f"session_{index:04d}"
+        store.create_conversation(Conversation(session_id, [], "2026-01-01T00:00:00", "2026-01-01T00:00:00"))
+        for turn in range(3):
+            store.append_message(session_id, Message('user', f"message {index} {turn} " * 10, "2026-01-01T00:00:00",
+                                                     message_id=f"{session_id}-{turn}"))
+    store.flush()
+    yield store
+    store.close()
+
+class Interrupted(Exception):
+    pass
+
+def interrupt_after(store, monkeypatch, count):
+    """Make the store's session stream fail after ``count`` sessions, like a killed export"""
+    iter_conversations = store.iter_conversations
+
+    def interrupted(*args, **kwargs):
+        for index, conversation in enumerate(iter_conversations(*args, **kwargs)):
+            if index == count:
+                raise Interrupted()
+            yield conversation
+
+    monkeypatch.setattr(store, 'iter_conversations', interrupted)
+
+@pytest.mark.parametrize("name", ["export.ndjson", "export.ndjson.gz"])
+@pytest.mark.parametrize("truncate", [False, True])
+def test_resumed_export_matches_uninterrupted_export(store, tmp_path, monkeypatch, name, truncate):
+    reference = str(tmp_path / ("reference-" + name))
+    archive.export_conversations(store, reference)
+    expected = list(archive.read_archive(reference))
+    assert len(expected) == SESSIONS
+
+    path = str(tmp_path / name)
+    progress = []
+    with monkeypatch.context() as patch:
+        interrupt_after(store, patch, 70)
+        with pytest.raises(Interrupted):
+            archive.export_conversations(store, path, checkpoint_every=25,
+                                         on_progress=lambda count, session_id: progress.append((count, session_id)))
+    assert progress == [(25, "session_0024"), (50, "session_0049")]
+    assert not os.path.exists(path)
+
+    partial = path + archive.PARTIAL_SUFFIX
+    if truncate:
+        # A hard kill leaves a torn last line, or a gzip stream without its end
+        with open(partial, 'r+b') as f:
+            f.truncate(os.path.getsize(partial) * 2 // 3)
+
+    result = archive.export_conversations(store, path, resume=True)
+    assert result['resumed'] + result['exported'] == SESSIONS
+    assert result['last_session_id'] == f"session_{SESSIONS - 1:04d}"
+    assert list(archive.read_archive(path)) == expected
+    assert not os.path.exists(partial)
+
+def test_export_imports_back(store, tmp_path):
+    path = str(tmp_path / "export.ndjson.gz")
+    archive.export_conversations(store, path)
+
+    restored = ConversationStore(str(tmp_path / "restored.db"))
+    try:
+        assert archive.import_conversations(restored, path) == SESSIONS
+        assert archive.import_conversations(restored, path) == 0
+        assert restored.count() == store.count()
+    finally:
+        restored.close()
@@ -0,0 +1,214 @@
+"""
+ConversationStore: write-behind durability, sharing one file between store
+instances, trigger-maintained statistics, refused-write requeue, migrations
+and the connection pool.
+
+Run from the repository root with: python -m pytest tests
+"""
+import sqlite3
+import threading
+import pytest
+from core.memory.conversation_store import MIGRATIONS, Conversation, ConversationStore, Message
+
+NOW = "2026-01-01T00:00:00"
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "conversations.db")
+
+@pytest.fixture
+def open_store(db_path):
+    """Open stores on the test database; every store is closed at teardown"""
+    stores = []
+
+    def _open(**options):
+        # A long interval keeps writes queued unless a test flushes them
+        options.setdefault('flush_interval', 60)
+        options.setdefault('flush_batch_size', 1000)
+        store = ConversationStore(db_path, **options)
+        stores.append(store)
+        return store
+
+    yield _open
+    for store in stores:
+        store.close()
+
+def add_session(store, session_id, *contents, timestamp=NOW):
+    store.create_conversation(Conversation(session_id, [], timestamp, timestamp))
+    for index, content in enumerate(contents):
+        store.append_message(session_id, Message('user', content, timestamp, message_id=f"{session_id}-{index}"))
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            'conversations': conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0],
+            'messages': conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        }
+    finally:
+        conn.close()
+
+def contents(conversation):
+    return [message.content for message in conversation.messages]
+
+def test_close_drains_queued_writes(open_store):
+    store = open_store()
+    add_session(store, 'a', 'one', 'two', 'three')
+    assert store.pending_writes() == 4
+    store.close()
+
+    reopened = open_store()
+    assert contents(reopened.load_conversation('a')) == ['one', 'two', 'three']
+    assert [message.message_id for message in reopened.load_conversation('a').messages] == ['a-0', 'a-1', 'a-2']
+
+def test_two_stores_on_one_file_see_each_others_writes(open_store):
+    first, second = open_store(), open_store()
+    add_session(first, 'a', 'one')
+    first.flush()
+
+    # second caches the session, then first appends; second reads only the new message
+    assert contents(second.load_conversation('a')) == ['one']
+    first.append_message('a', Message('assistant', 'two', NOW, message_id='a-1'))
+    first.flush()
+    assert contents(second.load_conversation('a')) == ['one', 'two']
+
+    add_session(second, 'b', 'three')
+    second.flush()
+    assert {row['session_id'] for row in first.list_conversations()} == {'a', 'b'}
+    assert first.count() == {'conversations': 2, 'messages': 3}
+
+def test_cached_session_refreshed_after_delete_elsewhere(open_store):
+    first, second = open_store(), open_store()
+    add_session(first, 'a', 'one', 'two')
+    first.flush()
+    assert contents(second.load_conversation('a')) == ['one', 'two']
+
+    first.delete_conversation('a')
+    first.flush()
+    assert second.load_conversation('a') is None
+
+def test_count_includes_queued_writes_without_flushing(open_store):
+    store = open_store()
+    add_session(store, 'a', 'price of chicken', 'delivery')
+    assert store.count() == {'conversations': 1, 'messages': 2}
+    assert store.pending_writes() == 3
+    overview = store.session_overview('a')
+    assert overview['message_count'] == 2
+    assert overview['topics'] == ['price', 'chicken', 'delivery']
+
+def test_delete_updates_stats(open_store, db_path):
+    store = open_store()
+    add_session(store, 'a', 'one', 'two')
+    add_session(store, 'b', 'three')
+    store.flush()
+
+    store.delete_conversation('a')
+    store.flush()
+    assert store.count() == table_counts(db_path) == {'conversations': 1, 'messages': 1}
+
+    store.delete_all()
+    store.flush()
+    assert store.count() == table_counts(db_path) == {'conversations': 0, 'messages': 0}
+
+def test_expire_updates_stats(open_store, db_path):
+    store = open_store()
+    add_session(store, 'old', 'one', 'two', timestamp="2025-01-01T00:00:00")
+    add_session(store, 'new', 'three')
+    store.flush()
+
+    assert store.expire_sessions("2025-06-01T00:00:00") == ['old']
+    assert store.load_conversation('old') is None
+    assert store.count() == table_counts(db_path) == {'conversations': 1, 'messages': 1}
+    assert store.session_overview('old') is None
+
+def test_refused_writes_stay_queued(open_store):
+    store = open_store(busy_timeout_ms=100)
+    add_session(store, 'a', 'one')
+    store.flush()
+
+    store.append_message('a', Message('user', 'during lock', NOW, message_id='a-1'))
+    other = sqlite3.connect(store.db_path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert store.flush() == 1
+        assert store.pending_writes() == 1
+    finally:
+        other.execute("COMMIT")
+        other.close()
+
+    assert store.flush() == 0
+    assert contents(store.load_all()['a']) == ['one', 'during lock']
+
+def test_bad_record_is_dropped_without_losing_the_batch(open_store):
+    store = open_store()
+    add_session(store, 'a', 'one')
+    store.flush()
+
+    store.append_message('a', Message('user', 'duplicate id', NOW, message_id='a-0'))
+    store.append_message('a', Message('user', 'two', NOW, message_id='a-1'))
+    assert store.flush() == 0
+    assert contents(store.load_all()['a']) == ['one', 'two']
+    # The cached copy had the dropped message; it is reread instead of kept
+    assert contents(store.load_conversation('a')) == ['one', 'two']
+
+def test_message_queued_during_a_full_read_is_not_lost(open_store):
+    store = open_store()
+    add_session(store, 'a', 'one')
+    store.flush()
+    store._sessions.clear()
+
+    flush = store.flush
+
+    def flush_then_append():
+        kept = flush()
+        store.flush = flush
+        # Queued after the read's flush, before its snapshot
+        store.append_message('a', Message('user', 'two', NOW, message_id='a-1'))
+        return kept
+
+    store.flush = flush_then_append
+    assert contents(store.load_conversation('a')) == ['one']
+    store.flush()
+    assert contents(store.load_conversation('a')) == ['one', 'two']
+
+def test_migrations_upgrade_an_unversioned_database(db_path, open_store):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE conversations (session_id TEXT PRIMARY KEY, created_at TEXT NOT NULL, last_updated TEXT NOT NULL, summary TEXT);
+        CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, role TEXT NOT NULL,
+                               content TEXT NOT NULL, timestamp TEXT NOT NULL, metadata TEXT);
+        INSERT INTO conversations VALUES ('a', '2025-01-01', '2025-01-01', NULL);
+        INSERT INTO messages (session_id, role, content, timestamp) VALUES ('a', 'user', 'farm order', '2025-01-01');
+        INSERT INTO messages (session_id, role, content, timestamp) VALUES ('a', 'assistant', 'ok', '2025-01-01');
+    """)
+    conn.close()
+
+    store = open_store()
+    assert store.count() == {'conversations': 1, 'messages': 2}
+    assert store.session_overview('a') == {'summary': None, 'message_count': 2, 'topics': ['farm', 'order']}
+    assert contents(store.load_conversation('a')) == ['farm order', 'ok']
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    finally:
+        conn.close()
+
+def test_short_lived_threads_do_not_leak_connections(open_store):
+    store = open_store(pool_size=2)
+    add_session(store, 'a', 'one')
+    store.flush()
+
+    def work(index):
+        store.append_message('a', Message('user', f'thread {index}', NOW, message_id=f'thread-{index}'))
+        store.load_conversation('a')
+        store.count()
+
+    for index in range(50):
+        thread = threading.Thread(target=work, args=(index,))
+        thread.start()
+        thread.join()
+    store.flush()
+
+    assert len(store._idle_connections) <= 2
+    assert store.count()['messages'] == 51
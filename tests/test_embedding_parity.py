@@ -0,0 +1,31 @@
+"""
+Parity of the ONNX embedding runtimes with torch, on the sample texts of
+scripts/check_embedding_parity.py. Skipped when ONNX Runtime is not
+installed or the model is not in the local Hugging Face cache; running
+python -m scripts.check_embedding_parity once downloads it.
+"""
+import pytest
+from config import Settings
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum")
+
+from huggingface_hub import try_to_load_from_cache
+from backend.embedding_service import RUNTIME_PARITY_MIN_COSINE, compare_runtimes, load_embeddings
+from scripts.check_embedding_parity import CORPUS_SAMPLE, QUERY_SAMPLE
+
+@pytest.fixture(scope="module")
+def torch_model_available():
+    # Checked against the cache first: an offline download attempt only fails after minutes of retries
+    if not isinstance(try_to_load_from_cache(Settings.EMBEDDING_MODEL, "config.json"), str):
+        pytest.skip(f"{Settings.EMBEDDING_MODEL} is not in the local Hugging Face cache")
+    try:
+        load_embeddings('torch')
+    except OSError as e:
+        pytest.skip(f"Embedding model unavailable: {e}")
+
+@pytest.mark.parametrize("runtime", sorted(RUNTIME_PARITY_MIN_COSINE))
+def test_runtime_stays_within_tolerance_of_torch(torch_model_available, runtime):
+    result = compare_runtimes(CORPUS_SAMPLE + QUERY_SAMPLE, runtime)
+    assert result['min_cosine'] >= RUNTIME_PARITY_MIN_COSINE[runtime], result
@@ -0,0 +1,82 @@
+"""
+HTTP API request handling: readiness, body validation and session lookup.
+The chat pipeline and session memory are replaced by small fakes, so nothing
+is loaded or stored.
+
+Run from the repository root with: python -m pytest tests
+"""
+import pytest
+from starlette.testclient import TestClient
+from frontend import http_api
+
+class FakeMemory:
+    def __init__(self, session_id):
+        self.current_session_id = session_id
+        self.messages = []
+
+    def add_message(self, role, content):
+        self.messages.append((role, content))
+
+    def get_conversation_context(self, max_messages=6):
+        return ""
+
+class FakeChatService:
+    def process_query(self, query, conversation_context="", session_id=None, on_token=None):
+        return {'result': f"echo: {query}", 'confidence': 90.0, 'route': None}
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client for a worker whose pipeline is ready; lifespan is not run"""
+    monkeypatch.setattr(http_api.app.state, 'ready', True, raising=False)
+    monkeypatch.setattr(http_api, 'get_chat_service', FakeChatService)
+    monkeypatch.setattr(http_api, '_open_memory',
+                        lambda session_id: None if session_id == 'missing' else FakeMemory(session_id or 'new-session'))
+    return TestClient(http_api.app)
+
+def test_chat_answers(client):
+    response = client.post('/chat', json={'message': "hello", 'session_id': 'abc'})
+    assert response.status_code == 200
+    assert response.json()['answer'] == "echo: hello"
+    assert response.json()['session_id'] == 'abc'
+
+def test_not_ready_returns_503_without_touching_the_pipeline(client, monkeypatch):
+    monkeypatch.setattr(http_api.app.state, 'ready', False)
+
+    def failing_open_memory(session_id):
+        raise AssertionError("the pipeline must not be initialized per request")
+
+    monkeypatch.setattr(http_api, '_open_memory', failing_open_memory)
+    for path in ('/chat', '/chat/stream'):
+        assert client.post(path, json={'message': "hello"}).status_code == 503
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"message": "caf\xe9"}', b"\xff\xfe\x00"])
+def test_malformed_body_returns_400(client, body):
+    response = client.post('/chat', content=body, headers={'Content-Type': "application/json"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("payload", [{'message': ""}, {'message': 42}, ["hello"], {'message': "hi", 'session_id': 7},
+                                     {'message': "hi", 'session_id': ['a']}])
+def test_invalid_fields_return_400(client, payload):
+    assert client.post('/chat', json=payload).status_code == 400
+
+def test_oversized_message_returns_413(client):
+    response = client.post('/chat', json={'message': "x" * (http_api.Settings.API_MAX_MESSAGE_CHARS + 1)})
+    assert response.status_code == 413
+
+def test_unknown_session_returns_404(client):
+    assert client.post('/chat', json={'message': "hello", 'session_id': 'missing'}).status_code == 404
+
+def test_memory_failure_returns_500(client, monkeypatch):
+    def broken_open_memory(session_id):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(http_api, '_open_memory', broken_open_memory)
+    response = client.post('/chat', json={'message': "hello"})
+    assert response.status_code == 500
+    assert response.json() == {'error': "Error processing your request"}
+
+def test_stream_sends_answer_then_done(client):
+    response = client.post('/chat/stream', json={'message': "hello"})
+    assert response.status_code == 200
+    assert response.text.startswith('event: token\ndata: "echo: hello"')
+    assert "event: done" in response.text
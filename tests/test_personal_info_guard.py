@@ -0,0 +1,82 @@
+"""
+Regression test: the compiled, pre-filtered PersonalInfoGuard.classify must agree
+with the original one-re.search-per-pattern implementation.
+
+Run from the repository root with: python -m pytest tests
+"""
+import re
+import itertools
+import pytest
+from backend.personal_info_guard import PersonalInfoGuard
+
+def per_pattern_classify(guard: PersonalInfoGuard, query: str):
+    """The guard as it was before patterns were combined: greetings first, then identity"""
+    query_lower = query.lower().strip()
+    if any(re.search(pattern, query_lower) for pattern in guard.personal_greeting_patterns):
+        return 'personal_greeting'
+    if any(re.search(pattern, query_lower) for pattern in guard.personal_identity_patterns):
+        return 'personal_identity'
+    return None
+
+HAND_PICKED = [
+    "What is the salary of a management trainee?",
+    "how much house allowance do i get",
+    "Who am I?",
+    "WHO ARE YOU",
+    "  tell me about myself  ",
+    "what's up",
+    "Whats up",
+    "how's it going with my leave request",
+    "my leave balance",
+    "what is my name and my email",
+    "hi, how are you doing? also who am i",
+    "who am i and how are you",
+    "whom should I contact about my role",
+    "who approves medical reimbursement",
+    "about medical allowance",
+    "tell me about maternity leave",
+    "is the personal loan policy available",
+    "how do you calculate the eid bonus",
+    "how are things at the panchagarh farm",
+    "are you fine with answering leave questions",
+    "my profile information is wrong",
+    "identify the hr manager",
+    "information about me\nand my data",
+    "how’s life",
+    "",
+    "   ",
+    "who",
+    "my",
+]
+
+PREFIXES = ["", "hi ", "hello, ", "Please ", "quick question: ", "ok so "]
+CORES = [
+    "who am i", "who are you", "about me", "my details", "my account", "personal information",
+    "identify me", "how are you", "how do you do", "how's your day", "are you okay", "what's up",
+    "salary of a driver", "house allowance", "annual leave policy", "hr email", "who is the hr director",
+    "how are leave days counted", "my salary", "the production bonus",
+]
+SUFFIXES = ["", "?", " please", " and my salary", " and how are you", " in panchagarh"]
+
+QUERIES = HAND_PICKED + [prefix + core + suffix for prefix, core, suffix in itertools.product(PREFIXES, CORES, SUFFIXES)]
+
+@pytest.fixture(scope="module")
+def guard():
+    return PersonalInfoGuard()
+
+def test_classify_matches_per_pattern_search(guard):
+    mismatches = [
+        (query, guard.classify(query), per_pattern_classify(guard, query))
+        for query in QUERIES
+        if guard.classify(query) != per_pattern_classify(guard, query)
+    ]
+    assert not mismatches
+
+def test_is_personal_info_query_matches_per_pattern_search(guard):
+    for query in QUERIES:
+        expected = any(re.search(pattern, query.lower().strip()) for pattern in guard.personal_identity_patterns)
+        assert guard.is_personal_info_query(query) == expected, query
+
+def test_query_set_covers_every_outcome(guard):
+    outcomes = {per_pattern_classify(guard, query) for query in QUERIES}
+    assert outcomes == {'personal_greeting', 'personal_identity', None}
@@ -0,0 +1,68 @@
+"""
+QueryRouter decisions on the shipped vocabulary: only small talk and clearly
+off-topic messages short circuit; anything else, including HR questions the
+vocabulary has no terms for, goes on to retrieval.
+
+Run from the repository root with: python -m pytest tests
+"""
+import pytest
+from backend.query_router import QueryRouter, RETRIEVAL_STAGES
+from core.models.query_features import QueryFeatures
+
+@pytest.fixture
+def router():
+    return QueryRouter()
+
+def route(router, query):
+    return router.route(QueryFeatures(query))
+
+@pytest.mark.parametrize("query", [
+    "What is the probation period?",
+    "What is the dress code?",
+    "Can I get an advance loan?",
+    "how many days notice do I have to give before resigning",
+])
+def test_hr_questions_without_vocabulary_terms_are_retrieved(router, query):
+    decision = route(router, query)
+    assert decision.route == 'retrieve'
+    assert decision.skipped_stages == ()
+
+@pytest.mark.parametrize("query", [
+    "What is the salary of a management trainee?",
+    "how much house allowance do i get",
+    "tell me a joke about the eid bonus",
+])
+def test_topic_terms_are_retrieved(router, query):
+    assert route(router, query).route == 'retrieve'
+
+@pytest.mark.parametrize("query, context_type", [
+    ("hello", 'small_talk_greeting'),
+    ("Thank you!", 'small_talk_thanks'),
+    ("bye", 'small_talk_farewell'),
+])
+def test_small_talk_is_answered_locally(router, query, context_type):
+    decision = route(router, query)
+    assert decision.route == 'local'
+    assert decision.context_type == context_type
+    assert decision.skipped_stages == RETRIEVAL_STAGES
+
+@pytest.mark.parametrize("query", [
+    "what's the weather like today",
+    "who won the cricket world cup",
+    "tell me a joke",
+])
+def test_off_topic_messages_fall_back(router, query):
+    decision = route(router, query)
+    assert decision.route == 'fallback'
+    assert decision.context_type == 'irrelevant_question'
+
+def test_vocabulary_terms_do_not_overlap():
+    vocabulary = QueryFeatures("").vocabulary
+    assert vocabulary.off_topic
+    assert vocabulary.off_topic.isdisjoint(vocabulary.topic_terms)
+    assert vocabulary.off_topic.isdisjoint(vocabulary.small_talk)
+
+def test_stats_count_each_route(router):
+    for query in ("hello", "tell me a joke", "What is the dress code?"):
+        route(router, query)
+    assert router.get_stats()['routes'] == {'local': 1, 'fallback': 1, 'retrieve': 1}